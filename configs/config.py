@@ -11,3 +11,68 @@ SUPABASE_BUCKET = "telegram-images"
 FACES_BUCKET = "faces"
 USER_ID = 212657982
 HR_ASSISTANT_MODEL = os.getenv("HR_ASSISTANT_MODEL", "gpt-4o-mini")
+
+# Hedged OpenAI requests: if the primary model is slower than the given
+# percentile of its observed latency, a second request is fired at the fallback.
+HR_ASSISTANT_FALLBACK_MODEL = os.getenv("HR_ASSISTANT_FALLBACK_MODEL") or HR_ASSISTANT_MODEL
+HR_ASSISTANT_HEDGE_PERCENTILE = float(os.getenv("HR_ASSISTANT_HEDGE_PERCENTILE", "90"))
+HR_ASSISTANT_HEDGE_DELAY = float(os.getenv("HR_ASSISTANT_HEDGE_DELAY", "15"))
+HR_ASSISTANT_HEDGE_MIN_SAMPLES = int(os.getenv("HR_ASSISTANT_HEDGE_MIN_SAMPLES", "20"))
+# Hedged requests in flight at most, losers included; beyond it requests aren't hedged.
+HR_ASSISTANT_MAX_HEDGES = int(os.getenv("HR_ASSISTANT_MAX_HEDGES", "4"))
+HR_ASSISTANT_REQUEST_TIMEOUT = float(os.getenv("HR_ASSISTANT_REQUEST_TIMEOUT", "60"))
+# Raw JDs are compacted before the OpenAI call and capped at this many chars.
+HR_ASSISTANT_MAX_INPUT_CHARS = int(os.getenv("HR_ASSISTANT_MAX_INPUT_CHARS", "6000"))
+# Bulk JD generation from an uploaded document.
+BULK_JD_MAX_ITEMS = int(os.getenv("BULK_JD_MAX_ITEMS", "50"))
+BULK_JD_CONCURRENCY = int(os.getenv("BULK_JD_CONCURRENCY", "4"))
+# OpenAI usage accounting: USD per 1M (prompt, completion) tokens and
+# per-user daily budgets (0 disables a budget).
+HR_ASSISTANT_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+}
+HR_ASSISTANT_DAILY_TOKEN_BUDGET = int(os.getenv("HR_ASSISTANT_DAILY_TOKEN_BUDGET", "0"))
+HR_ASSISTANT_DAILY_COST_BUDGET = float(os.getenv("HR_ASSISTANT_DAILY_COST_BUDGET", "0"))
+# "reject" answers with an error, "queue" runs the request after the budget resets.
+HR_ASSISTANT_BUDGET_MODE = os.getenv("HR_ASSISTANT_BUDGET_MODE", "reject")
+USAGE_DB_PATH = os.getenv("USAGE_DB_PATH", "state/usage.sqlite3")
+# Worker processes rendering job cards.
+RENDER_POOL_SIZE = int(os.getenv("RENDER_POOL_SIZE", "2"))
+# Encoded job card format: png (lossless, alpha dropped when opaque), jpeg or webp.
+CARD_IMAGE_FORMAT = os.getenv("CARD_IMAGE_FORMAT", "jpeg").lower()
+CARD_IMAGE_QUALITY = int(os.getenv("CARD_IMAGE_QUALITY", "90"))
+CARD_PNG_COMPRESS_LEVEL = int(os.getenv("CARD_PNG_COMPRESS_LEVEL", "6"))
+# Encoded cards kept in memory (with their Telegram file_id) for identical re-renders.
+RENDER_CACHE_MAX_BYTES = int(os.getenv("RENDER_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# Job card templates and layouts, see the file for its format.
+CARD_TEMPLATES_PATH = os.getenv("CARD_TEMPLATES_PATH", "assets/templates/cards.yaml")
+# Telegram message cleanup: deletes in flight and deletes per second.
+CLEANUP_CONCURRENCY = int(os.getenv("CLEANUP_CONCURRENCY", "4"))
+CLEANUP_RATE_PER_SECOND = float(os.getenv("CLEANUP_RATE_PER_SECOND", "20"))
+CLEANUP_MAX_RETRIES = int(os.getenv("CLEANUP_MAX_RETRIES", "3"))
+# Outbound Telegram API scheduling (requests per second).
+TELEGRAM_GLOBAL_RATE = float(os.getenv("TELEGRAM_GLOBAL_RATE", "25"))
+TELEGRAM_CHAT_RATE = float(os.getenv("TELEGRAM_CHAT_RATE", "1"))
+TELEGRAM_CHAT_BURST = float(os.getenv("TELEGRAM_CHAT_BURST", "3"))
+TELEGRAM_MAX_RETRIES = int(os.getenv("TELEGRAM_MAX_RETRIES", "3"))
+# Finished update traces kept in memory for /traces.
+TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", "200"))
+# Startup warm-up: seconds before a single step (e.g. the OpenAI handshake) is given up.
+WARMUP_STEP_TIMEOUT = float(os.getenv("WARMUP_STEP_TIMEOUT", "30"))
+# Graceful shutdown: seconds in-flight updates get to finish, and where jobs cut
+# off after that are journaled for replay on the next start.
+SHUTDOWN_DRAIN_TIMEOUT = float(os.getenv("SHUTDOWN_DRAIN_TIMEOUT", "20"))
+PENDING_JOBS_PATH = os.getenv("PENDING_JOBS_PATH", "state/pending_jobs.jsonl")
+# Forwarded photos: "download" fetches the photo as soon as a post is forwarded,
+# "upload" also stages it in storage so saving only links it, "off" waits for the save.
+IMAGE_PREFETCH_MODE = os.getenv("IMAGE_PREFETCH_MODE", "download").lower()
+# Seconds a forwarded post's flow may sit unanswered before it is dropped and,
+# under "upload", its staged photo removed.
+IMAGE_PREFETCH_TTL = float(os.getenv("IMAGE_PREFETCH_TTL", "3600"))
+# Channel posts stored as the bot sees them as a channel admin:
+# "<channel_id>:<job|news|auto>,..."; "auto" classifies each post by its text.
+INGEST_CHANNELS = os.getenv("INGEST_CHANNELS", "")
+INGEST_CONCURRENCY = int(os.getenv("INGEST_CONCURRENCY", "2"))
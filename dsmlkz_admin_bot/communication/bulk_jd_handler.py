@@ -0,0 +1,287 @@
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import os
+import re
+import time
+import zipfile
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from aiogram import types
+
+from configs.config import (BULK_JD_CONCURRENCY, BULK_JD_MAX_ITEMS,
+                            HR_ASSISTANT_BUDGET_MODE)
+from dsmlkz_admin_bot.communication.router import UpdateRouter
+from dsmlkz_admin_bot.services.card_templates import get_card_templates
+from dsmlkz_admin_bot.services.drain_service import get_drain_service
+from dsmlkz_admin_bot.services.hr_assistant_service import get_hr_assistant
+from dsmlkz_admin_bot.services.jd_drawing_service import card_filename
+from dsmlkz_admin_bot.services.render_service import get_render_service
+from dsmlkz_admin_bot.services.usage_service import (BudgetExceededError,
+                                                     get_usage_tracker)
+
+SUPPORTED_EXTENSIONS = (".txt", ".md", ".jsonl")
+# JDs in .txt/.md documents are separated by a line of ---, === or ***.
+SEPARATOR_RE = re.compile(r"^\s*(?:-{3,}|={3,}|\*{3,})\s*$", re.MULTILINE)
+PROGRESS_UPDATE_INTERVAL = 2.0
+
+log = logging.getLogger(__name__)
+
+# Running batches; referenced so they aren't garbage-collected mid-run.
+_bulk_tasks: Set[asyncio.Task] = set()
+
+
+def split_jds(content: str, extension: str) -> List[str]:
+    """Splits an uploaded document into separate JD texts."""
+    if extension == ".jsonl":
+        jds = []
+        for line in content.splitlines():
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            if isinstance(item, dict):
+                item = item.get("text") or item.get("jd") or ""
+            jds.append(str(item))
+    else:
+        jds = SEPARATOR_RE.split(content)
+    return [jd.strip() for jd in jds if jd and jd.strip()]
+
+
+def _card_filename(index: int, meta_info: dict) -> str:
+    position = meta_info.get("position_name") or "job"
+    slug = re.sub(r"\W+", "_", position).strip("_").lower()[:40] or "job"
+    return card_filename(f"{index:03d}_{slug}")
+
+
+class BulkJdJob:
+    """
+    Runs text2dict and card rendering for a batch of JDs and reports progress.
+
+    ``done`` maps the 1-based index of items already generated by a previous
+    run to their meta info (their ``jds`` entry is None); they are only
+    rendered again. Items finished in this run are recorded the same way in
+    ``journal``, the payload of its drain job, so a replay skips them.
+    """
+
+    def __init__(
+        self,
+        message: types.Message,
+        jds: List[Optional[str]],
+        job_type: str,
+        done: Optional[Dict[str, dict]] = None,
+        journal: Optional[Dict[str, Any]] = None,
+    ):
+        self.message = message
+        self.jds = jds
+        self.job_type = job_type
+        self.done = done or {}
+        self.journal = journal
+        self.assistant = get_hr_assistant()
+        self.finished = 0
+        self.failed = 0
+        self.progress_message: Optional[types.Message] = None
+        self._last_progress_update = 0.0
+
+    async def run(self) -> Tuple[bytes, str]:
+        """Returns zip archive bytes with cards and the combined Markdown."""
+        self.progress_message = await self.message.reply(self._progress_text())
+        semaphore = asyncio.Semaphore(BULK_JD_CONCURRENCY)
+        results = await asyncio.gather(
+            *(
+                self._process_one(index, jd, semaphore)
+                for index, jd in enumerate(self.jds, start=1)
+            )
+        )
+        await self._update_progress(force=True)
+
+        archive = io.BytesIO()
+        markdown_parts = []
+        with zipfile.ZipFile(archive, "w", zipfile.ZIP_STORED) as zf:
+            for card_name, card_bytes, markdown in results:
+                if card_bytes:
+                    zf.writestr(card_name, card_bytes)
+                markdown_parts.append(markdown)
+        return archive.getvalue(), "\n\n---\n\n".join(markdown_parts)
+
+    async def _process_one(self, index, jd, semaphore):
+        try:
+            meta_info = self.done.get(str(index))
+            if meta_info is None:
+                async with semaphore:
+                    meta_info = await asyncio.to_thread(
+                        self.assistant.text2dict, jd, self.message.from_user.id
+                    )
+                self._mark_done(index, meta_info)
+            card_bytes = await get_render_service().render(self.job_type, meta_info)
+            markdown = self.assistant.dict2markdown(
+                self.assistant.replace_markdown_symbols(meta_info)
+            )
+            return _card_filename(index, meta_info), card_bytes, markdown
+        except Exception as e:
+            log.exception("Bulk JD item failed: index=%s", index)
+            self.failed += 1
+            return None, None, f"Item {index} failed: {e}"
+        finally:
+            self.finished += 1
+            await self._update_progress()
+
+    def _mark_done(self, index: int, meta_info: dict):
+        if self.journal is not None:
+            self.journal["jds"][index - 1] = None
+            self.journal["done"][str(index)] = meta_info
+
+    def _progress_text(self) -> str:
+        text = f"Генерирую вакансии: {self.finished}/{len(self.jds)}"
+        if self.failed:
+            text += f" (ошибок: {self.failed})"
+        return text
+
+    async def _update_progress(self, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self._last_progress_update < PROGRESS_UPDATE_INTERVAL:
+            return
+        self._last_progress_update = now
+        try:
+            await self.progress_message.edit_text(self._progress_text())
+        except Exception:
+            # "message is not modified" and similar edits are not worth failing for
+            log.debug("Failed to update bulk JD progress", exc_info=True)
+
+
+async def handle_bulk_document(message: types.Message):
+    document = message.document
+    extension = os.path.splitext(document.file_name or "")[1].lower()
+    if extension not in SUPPORTED_EXTENSIONS:
+        await message.reply(
+            "Поддерживаются документы .txt, .md и .jsonl с несколькими вакансиями."
+        )
+        return
+
+    templates = get_card_templates()
+    job_type = (message.caption or "").strip().lower()
+    if job_type not in templates:
+        job_type = templates.default
+
+    buffer = io.BytesIO()
+    await document.download(destination_file=buffer)
+    try:
+        jds = split_jds(buffer.getvalue().decode("utf-8"), extension)
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        await message.reply(f"Не удалось прочитать документ: {e}")
+        return
+
+    if not jds:
+        await message.reply("В документе не найдено ни одной вакансии.")
+        return
+    if len(jds) > BULK_JD_MAX_ITEMS:
+        await message.reply(
+            f"Слишком много вакансий: {len(jds)}, максимум {BULK_JD_MAX_ITEMS}."
+        )
+        return
+
+    log.info(
+        "Bulk JD document received: user=%s file=%s type=%s items=%s",
+        message.from_user.id,
+        document.file_name,
+        job_type,
+        len(jds),
+    )
+    await process_bulk_job(message, jds, job_type)
+
+
+async def process_bulk_job(
+    message: types.Message,
+    jds: List[Optional[str]],
+    job_type: str,
+    done: Optional[Dict[str, dict]] = None,
+):
+    """
+    Starts the batch in a background task or, over budget, rejects or queues it.
+    Also replays journaled batches.
+    """
+    drain = get_drain_service()
+    try:
+        get_usage_tracker().ensure_budget(message.from_user.id)
+    except BudgetExceededError as e:
+        if HR_ASSISTANT_BUDGET_MODE == "queue":
+            task = get_usage_tracker().queue_until_budget(
+                message.from_user.id,
+                lambda: run_journaled_bulk_job(message, jds, job_type, done),
+            )
+            drain.defer(
+                task,
+                "bulk_jd",
+                message=message.to_python(),
+                jds=list(jds),
+                job_type=job_type,
+                done=dict(done or {}),
+            )
+            await message.reply(f"⏳ Лимит исчерпан ({e}), документ в очереди.")
+        else:
+            await message.reply(f"⛔ Лимит исчерпан: {e}")
+        return
+
+    # In the background: a batch takes minutes, and holding the webhook response
+    # that long makes Telegram resend the update and start the batch again.
+    task = asyncio.create_task(run_journaled_bulk_job(message, jds, job_type, done))
+    _bulk_tasks.add(task)
+    task.add_done_callback(_bulk_tasks.discard)
+
+
+async def run_journaled_bulk_job(
+    message: types.Message,
+    jds: List[Optional[str]],
+    job_type: str,
+    done: Optional[Dict[str, dict]] = None,
+):
+    try:
+        # copies: finished items are moved from jds to done as the batch goes
+        with get_drain_service().job(
+            "bulk_jd",
+            message=message.to_python(),
+            jds=list(jds),
+            job_type=job_type,
+            done=dict(done or {}),
+        ) as journal:
+            await run_bulk_job(message, jds, job_type, done, journal)
+    except Exception:
+        log.exception("Bulk JD failed: user=%s items=%s", message.from_user.id, len(jds))
+        with contextlib.suppress(Exception):
+            await message.reply("Не удалось сгенерировать вакансии, попробуйте ещё раз.")
+
+
+async def replay_bulk_job(
+    message: dict, jds: List[Optional[str]], job_type: str, done: Optional[Dict[str, dict]] = None
+):
+    await process_bulk_job(types.Message.to_object(message), jds, job_type, done)
+
+
+async def run_bulk_job(
+    message: types.Message,
+    jds: List[Optional[str]],
+    job_type: str,
+    done: Optional[Dict[str, dict]] = None,
+    journal: Optional[Dict[str, Any]] = None,
+):
+    job = BulkJdJob(message, jds, job_type, done, journal)
+    archive, markdown = await job.run()
+
+    await message.answer_document(
+        types.InputFile(io.BytesIO(archive), filename="job_cards.zip")
+    )
+    await message.answer_document(
+        types.InputFile(io.BytesIO(markdown.encode("utf-8")), filename="job_posts.md")
+    )
+    log.info(
+        "Bulk JD finished: user=%s items=%s failed=%s",
+        message.from_user.id,
+        len(jds),
+        job.failed,
+    )
+
+
+def register_bulk_jd(router: UpdateRouter):
+    get_drain_service().register_replay("bulk_jd", replay_bulk_job)
+    router.message(handle_bulk_document, types.ContentType.DOCUMENT)
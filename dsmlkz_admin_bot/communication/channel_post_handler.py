@@ -0,0 +1,21 @@
+from aiogram import types
+
+from dsmlkz_admin_bot.communication.router import UpdateRouter
+from dsmlkz_admin_bot.services.channel_ingest_service import \
+    get_channel_ingest_service
+from dsmlkz_admin_bot.services.drain_service import get_drain_service
+
+
+async def handle_channel_post(message: types.Message):
+    get_channel_ingest_service().enqueue(message)
+
+
+async def handle_edited_channel_post(message: types.Message):
+    get_channel_ingest_service().enqueue(message, edited=True)
+
+
+def register_channel_posts(router: UpdateRouter):
+    get_drain_service().register_replay("channel_post", get_channel_ingest_service().replay)
+    for content_type in (types.ContentType.TEXT, types.ContentType.PHOTO):
+        router.channel_post(handle_channel_post, content_type)
+        router.channel_post(handle_edited_channel_post, content_type, edited=True)
@@ -1,11 +1,24 @@
+import asyncio
 import logging
+import time
 
 from aiogram import Bot, Dispatcher, types
 
+from configs.config import IMAGE_PREFETCH_TTL
+from dsmlkz_admin_bot.communication.bulk_jd_handler import register_bulk_jd
+from dsmlkz_admin_bot.communication.channel_post_handler import \
+    register_channel_posts
 from dsmlkz_admin_bot.communication.message_processor import MessageProcessor
-from dsmlkz_admin_bot.communication.new_jd_handler import register_new_jd
+from dsmlkz_admin_bot.communication.new_jd_handler import (
+    get_conversation_state, register_new_jd)
+from dsmlkz_admin_bot.communication.router import UpdateRouter
+from dsmlkz_admin_bot.communication.stats_handler import register_stats
+from dsmlkz_admin_bot.communication.usage_handler import register_usage
 from dsmlkz_admin_bot.keyboards import (get_action_keyboard,
                                         get_confirmation_keyboard)
+from dsmlkz_admin_bot.services.cleanup_service import get_cleanup_service
+from dsmlkz_admin_bot.services.drain_service import get_drain_service
+from dsmlkz_admin_bot.utils.single_flight import SingleFlight
 
 # Temporary in-memory storage
 user_message_storage = {}
@@ -13,28 +26,58 @@ user_message_storage = {}
 log = logging.getLogger(__name__)
 
 
-async def clean_up_messages(bot: Bot, user_id: int, message_ids: list):
-    """Safely delete messages."""
-    for msg_id in message_ids:
-        if msg_id:
-            try:
-                await bot.delete_message(user_id, msg_id)
-            except Exception:
-                pass
+def clean_up_messages(bot: Bot, user_id: int, message_ids: list):
+    """Forget the user's flow and delete its messages in the background."""
     user_message_storage.pop(user_id, None)
-
-
-def register_message_handlers(dp: Dispatcher, bot: Bot):
+    get_cleanup_service(bot).schedule(user_id, message_ids)
+
+
+async def sweep_abandoned_flows(max_age: float = IMAGE_PREFETCH_TTL):
+    """Drops flows started more than ``max_age`` seconds ago and removes their staged photos."""
+    now = time.monotonic()
+    for user_id, storage in list(user_message_storage.items()):
+        if now - storage["started"] < max_age:
+            continue
+        if user_message_storage.get(user_id) is storage:
+            user_message_storage.pop(user_id)
+        log.info("Dropping abandoned flow: user=%s", user_id)
+        await storage["processor"].cancel_prefetch()
+
+
+async def run_flow_sweeper(interval: float = IMAGE_PREFETCH_TTL / 4):
+    """Sweeps abandoned flows every ``interval`` seconds until cancelled."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await sweep_abandoned_flows()
+        except Exception:
+            log.exception("Failed to sweep abandoned flows")
+
+
+async def replay_save_message(message: dict, message_type: str):
+    """Re-runs a confirmed save cut off by a restart; its flow messages are gone by then."""
+    bot = Bot.get_current()
+    message = types.Message.to_object(message)
+    await MessageProcessor(bot, message).process_message(message_type)
+    await bot.send_message(message.from_user.id, "✅ Saved to DB after a restart.")
+
+
+async def ask_to_forward(message: types.Message):
+    await message.reply("⚠️ Please forward a message from a channel.")
+
+
+def register_message_handlers(dp: Dispatcher, bot: Bot) -> UpdateRouter:
+    router = UpdateRouter(get_state=get_conversation_state)
+    register_usage(router)
+    register_stats(router)
+    register_new_jd(router)
+    register_bulk_jd(router)
+    register_channel_posts(router)
+    get_drain_service().register_replay("save_message", replay_save_message)
     # Temporary media group tracking
-    register_new_jd(dp)
     media_group_cache = {}
 
-    @dp.message_handler(content_types=[types.ContentType.TEXT, types.ContentType.PHOTO])
     async def handle_forwarded(message: types.Message):
-        if not message.forward_from_chat:
-            await message.reply("⚠️ Please forward a message from a channel.")
-            return
-
         # Skip if we've already handled this media group
         if message.media_group_id:
             cached_group = media_group_cache.get(message.from_user.id)
@@ -42,10 +85,19 @@ def register_message_handlers(dp: Dispatcher, bot: Bot):
                 return  # Already handled
             media_group_cache[message.from_user.id] = message.media_group_id
 
+        previous = user_message_storage.get(message.from_user.id)
+        if previous:
+            # an abandoned flow: don't leave its photo downloading or staged
+            await previous["processor"].cancel_prefetch()
+
         processor = MessageProcessor(bot, message)
+        processor.start_prefetch()
         user_message_storage[message.from_user.id] = {
             "processor": processor,
             "message": message,
+            "started": time.monotonic(),
+            # double-tapped buttons join the running action instead of repeating it
+            "flights": SingleFlight("forward_flow"),
         }
         log.info(
             "Forwarded message received: user=%s channel=%s message_id=%s media_group=%s",
@@ -64,17 +116,6 @@ def register_message_handlers(dp: Dispatcher, bot: Bot):
             "control_message_id"
         ] = control_message.message_id
 
-    @dp.callback_query_handler(
-        lambda c: c.data
-        in [
-            "parse_job",
-            "parse_news",
-            "confirm_save",
-            "cancel_action",
-            "cancel_save",
-            "decline_save",
-        ]
-    )
     async def handle_callback(callback_query: types.CallbackQuery):
         user_id = callback_query.from_user.id
         storage = user_message_storage.get(user_id)
@@ -97,7 +138,8 @@ def register_message_handlers(dp: Dispatcher, bot: Bot):
                 getattr(message, "message_id", None),
                 callback_query.data,
             )
-            await clean_up_messages(
+            await callback_query.answer("❌ Action cancelled.", show_alert=False)
+            clean_up_messages(
                 bot,
                 user_id,
                 [
@@ -107,64 +149,96 @@ def register_message_handlers(dp: Dispatcher, bot: Bot):
                     message.message_id,
                 ],
             )
-            await callback_query.answer("❌ Action cancelled.", show_alert=False)
+            await processor.cancel_prefetch()
             return
 
         # ✅ Parse job/news
         if callback_query.data in ["parse_job", "parse_news"]:
             message_type = "job" if callback_query.data == "parse_job" else "news"
-            log.info(
-                "Parsing request: user=%s message_id=%s type=%s",
-                user_id,
-                getattr(message, "message_id", None),
-                message_type,
-            )
-            parsed_message = (
-                await processor.parse_job()
-                if message_type == "job"
-                else await processor.parse_news()
-            )
 
-            storage["parsed_message"] = parsed_message
+            async def parse_and_preview():
+                log.info(
+                    "Parsing request: user=%s message_id=%s type=%s",
+                    user_id,
+                    getattr(message, "message_id", None),
+                    message_type,
+                )
+                parsed_message = (
+                    await processor.parse_job()
+                    if message_type == "job"
+                    else await processor.parse_news()
+                )
 
-            preview_message = await bot.send_message(
-                user_id, parsed_message.full_text_html, parse_mode="HTML"
-            )
-            confirmation_message = await bot.send_message(
-                user_id,
-                "Do you want to save this record to the database?",
-                reply_markup=get_confirmation_keyboard(),
-            )
+                storage["parsed_message"] = parsed_message
+                storage["message_type"] = message_type
+
+                preview_message = await bot.send_message(
+                    user_id, parsed_message.full_text_html, parse_mode="HTML"
+                )
+                confirmation_message = await bot.send_message(
+                    user_id,
+                    "Do you want to save this record to the database?",
+                    reply_markup=get_confirmation_keyboard(),
+                )
 
-            storage["preview_message_id"] = preview_message.message_id
-            storage["confirmation_message_id"] = confirmation_message.message_id
+                storage["preview_message_id"] = preview_message.message_id
+                storage["confirmation_message_id"] = confirmation_message.message_id
+
+            await storage["flights"].do(callback_query.data, parse_and_preview)
 
         # 💾 Confirm Save
         if callback_query.data == "confirm_save":
-            parsed_message = storage.get("parsed_message")
-            if parsed_message:
-                image_url = await processor.store_image()
-                if image_url:
-                    parsed_message.image_url = image_url
 
-                await processor.save_parsed_message(parsed_message)
+            async def save():
+                parsed_message = storage.get("parsed_message")
+                if parsed_message:
+                    with get_drain_service().job(
+                        "save_message",
+                        message=message.to_python(),
+                        message_type=storage.get("message_type", "news"),
+                    ):
+                        image_url = await processor.store_image()
+                        if image_url:
+                            parsed_message.image_url = image_url
+
+                        await processor.save_parsed_message(parsed_message)
+                    log.info(
+                        "Saved parsed message: user=%s channel=%s message_id=%s",
+                        user_id,
+                        parsed_message.meta_information.get("channel_name"),
+                        parsed_message.meta_information.get("message_id"),
+                    )
+                return parsed_message
+
+            if await storage["flights"].do("confirm_save", save):
                 await callback_query.answer(
                     "✅ Successfully saved to DB!", show_alert=True
                 )
-                log.info(
-                    "Saved parsed message: user=%s channel=%s message_id=%s",
+
+            # the flow is popped here, so a later tap gets "Please forward a message first."
+            if user_message_storage.get(user_id) is storage:
+                clean_up_messages(
+                    bot,
                     user_id,
-                    parsed_message.meta_information.get("channel_name"),
-                    parsed_message.meta_information.get("message_id"),
+                    [
+                        control_message_id,
+                        storage.get("preview_message_id"),
+                        storage.get("confirmation_message_id"),
+                        message.message_id,
+                    ],
                 )
 
-            await clean_up_messages(
-                bot,
-                user_id,
-                [
-                    control_message_id,
-                    storage.get("preview_message_id"),
-                    storage.get("confirmation_message_id"),
-                    message.message_id,
-                ],
-            )
+    for content_type in (types.ContentType.TEXT, types.ContentType.PHOTO):
+        router.message(handle_forwarded, content_type, forwarded=True)
+        router.message(ask_to_forward, content_type)
+    for action in (
+        "parse_job",
+        "parse_news",
+        "confirm_save",
+        "cancel_action",
+        "cancel_save",
+        "decline_save",
+    ):
+        router.callback(action, handle_callback)
+    router.setup(dp)
+    return router
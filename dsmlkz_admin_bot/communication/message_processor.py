@@ -1,14 +1,14 @@
+import asyncio
 import logging
 import uuid
+from typing import Optional, Tuple
 
-import aiohttp
 from aiogram import Bot, types
-from supabase import create_client
 
-from configs.config import SUPABASE_BUCKET, SUPABASE_KEY, SUPABASE_URL
+from configs.config import IMAGE_PREFETCH_MODE, SUPABASE_BUCKET, SUPABASE_URL
 from dsmlkz_admin_bot.parsing import BaseParsing, JobsParsing, ParsedMessage
-
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+from dsmlkz_admin_bot.services.supabase_client import get_supabase
+from dsmlkz_admin_bot.utils.tracing import traced
 
 log = logging.getLogger(__name__)
 
@@ -36,6 +36,13 @@ class MessageProcessor:
         self.bot = bot
         self.message = message
         self.bucket = bucket
+        # resolves to (image bytes, staged object name or None), see start_prefetch
+        self._prefetch: Optional[asyncio.Task] = None
+        # named before the upload starts, so a cancelled prefetch can still remove it
+        self._staged_name: Optional[str] = None
+        self._staging: Optional[asyncio.Future] = None
+        # set once a save has linked the staged photo, which then must be kept
+        self._staged_linked = False
         log.info(
             "Initialized MessageProcessor: message_id=%s user=%s chat=%s fwd_from=%s has_photo=%s text_len=%s caption_len=%s",
             message.message_id,
@@ -47,6 +54,7 @@ class MessageProcessor:
             len(message.caption or "") if getattr(message, "caption", None) else 0,
         )
 
+    @traced("parse_job")
     async def parse_job(self):
         """Parses job-type messages into structured format."""
         parser = JobsParsing()
@@ -58,6 +66,7 @@ class MessageProcessor:
         )
         return parsed
 
+    @traced("parse_news")
     async def parse_news(self):
         """Parses news-type messages into structured format."""
         parser = BaseParsing()
@@ -69,6 +78,7 @@ class MessageProcessor:
         )
         return parsed
 
+    @traced("download_image")
     async def download_image(self, file_id: str) -> bytes:
         """
         Downloads an image from Telegram servers by file_id.
@@ -77,51 +87,147 @@ class MessageProcessor:
         :return: Image bytes.
         """
         file_info = await self.bot.get_file(file_id)
-        file_url = (
-            f"https://api.telegram.org/file/bot{self.bot._token}/{file_info.file_path}"
+        # Reuses the bot's pooled session (and its warm TLS connection to
+        # api.telegram.org) instead of opening a new one per image.
+        data = (await self.bot.download_file(file_info.file_path)).getvalue()
+        log.info(
+            "Downloaded image from Telegram: file_id=%s size=%s bytes path=%s",
+            file_id,
+            len(data),
+            file_info.file_path,
+        )
+        return data
+
+    def start_prefetch(self, mode: str = IMAGE_PREFETCH_MODE) -> Optional[asyncio.Task]:
+        """
+        Starts fetching the attached photo in the background while the user is
+        still choosing what to do with the post, so saving doesn't wait for it.
+
+        :param mode: "download" keeps the bytes in memory, "upload" also stages
+            them in storage, anything else disables prefetching.
+        :return: The prefetch task, or None if nothing was started.
+        """
+        if not self.message.photo or mode not in ("download", "upload") or self._prefetch:
+            return None
+        self._prefetch = asyncio.create_task(self._prefetch_image(stage=mode == "upload"))
+        self._prefetch.add_done_callback(self._prefetch_done)
+        return self._prefetch
+
+    def _prefetch_done(self, task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            log.warning(
+                "Image prefetch failed: message_id=%s",
+                self.message.message_id,
+                exc_info=task.exception(),
+            )
+
+    async def _prefetch_image(self, stage: bool) -> Tuple[bytes, Optional[str]]:
+        image_bytes = await self.download_image(self.message.photo[-1].file_id)
+        image_name = None
+        if stage:
+            image_name = self._staged_name = self.new_image_name()
+            self._staging = asyncio.ensure_future(
+                self.upload_image_to_supabase(image_bytes, image_name)
+            )
+            # shielded: the thread uploading it can't be stopped anyway, and
+            # cancel_prefetch waits for it before removing the object
+            await asyncio.shield(self._staging)
+        log.info(
+            "Prefetched image: message_id=%s size=%s staged=%s",
+            self.message.message_id,
+            len(image_bytes),
+            image_name,
         )
+        return image_bytes, image_name
+
+    async def cancel_prefetch(self):
+        """Stops the prefetch and removes the photo if it was staged in storage but not linked."""
+        task, self._prefetch = self._prefetch, None
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await asyncio.gather(task, return_exceptions=True)
+            if self._staging is not None:
+                # a cancelled prefetch leaves its upload running; it may still land
+                await asyncio.gather(self._staging, return_exceptions=True)
+        finally:
+            await self._remove_staged()
 
-        async with aiohttp.ClientSession() as session:
-            async with session.get(file_url) as response:
-                response.raise_for_status()
-                data = await response.read()
-                log.info(
-                    "Downloaded image from Telegram: file_id=%s size=%s bytes path=%s",
-                    file_id,
-                    len(data),
-                    file_info.file_path,
-                )
-                return data
+    async def _remove_staged(self):
+        image_name, self._staged_name = self._staged_name, None
+        if not image_name or self._staged_linked:
+            return
+        try:
+            await asyncio.to_thread(get_supabase().storage.from_(self.bucket).remove, [image_name])
+            log.info("Removed staged image: name=%s", image_name)
+        except Exception:
+            log.warning("Failed to remove staged image: name=%s", image_name, exc_info=True)
+
+    async def _prefetched(self) -> Optional[Tuple[bytes, Optional[str]]]:
+        task = self._prefetch
+        if task is None:
+            return None
+        # wait() rather than await: a prefetch cancelled by cancel_prefetch
+        # must not surface as cancellation of the save waiting for it
+        await asyncio.wait({task})
+        if task.cancelled() or task.exception() is not None:
+            log.info("No prefetched image, fetching again: message_id=%s", self.message.message_id)
+            return None
+        return task.result()
 
     async def store_image(self):
         """
         Downloads the attached image from the Telegram message and uploads it to Supabase storage.
+        Uses the prefetched bytes, or links the staged upload, after ``start_prefetch``.
 
         :return: URL of the stored image or None if no image exists.
         """
         if self.message.photo:
-            photo = self.message.photo[-1]
-            image_bytes = await self.download_image(photo.file_id)
+            prefetched = await self._prefetched()
+            if prefetched is None:
+                photo = self.message.photo[-1]
+                image_bytes = await self.download_image(photo.file_id)
+            else:
+                image_bytes, image_name = prefetched
+                if image_name:
+                    self._staged_linked = True
+                    log.info("Linking staged image: name=%s", image_name)
+                    return self.public_url(image_name)
             image_url = await self.upload_image_to_supabase(image_bytes)
             return image_url
         return None
 
-    async def upload_image_to_supabase(self, image_bytes: bytes) -> str:
+    @staticmethod
+    def new_image_name() -> str:
+        return f"{uuid.uuid4()}.jpg"
+
+    def public_url(self, image_name: str) -> str:
+        return f"{SUPABASE_URL}/storage/v1/object/public/{self.bucket}/{image_name}"
+
+    @traced("upload_image_to_supabase")
+    async def upload_image_to_supabase(
+        self, image_bytes: bytes, image_name: Optional[str] = None
+    ) -> str:
         """
         Uploads image bytes to Supabase storage.
 
         :param image_bytes: Raw image data.
-        :param bucket: Supabase bucket name.
+        :param image_name: Object name, a new random one by default.
         :return: Public URL of the stored image.
         """
-        image_name = f"{uuid.uuid4()}.jpg"
-        result = supabase.storage.from_(self.bucket).upload(
-            image_name, image_bytes, {"content-type": "image/jpeg"}
+        image_name = image_name or self.new_image_name()
+        # in a thread: with prefetching this runs next to other updates
+        result = await asyncio.to_thread(
+            get_supabase().storage.from_(self.bucket).upload,
+            image_name,
+            image_bytes,
+            {"content-type": "image/jpeg"},
         )
         if result.status_code != 200:
             raise Exception(f"Upload failed: {result.content}")
 
-        public_url = f"{SUPABASE_URL}/storage/v1/object/public/{self.bucket}/{image_name}"
+        public_url = self.public_url(image_name)
         log.info(
             "Uploaded image to Supabase: name=%s status=%s public_url=%s",
             image_name,
@@ -131,6 +237,7 @@ class MessageProcessor:
 
         return public_url
 
+    @traced("save_message")
     async def save_message(self, data: dict, table: str = "channels_content"):
         """
         Saves parsed message data to the Supabase database.
@@ -139,7 +246,7 @@ class MessageProcessor:
         :param table: Supabase table name to store data.
         :return: Supabase response.
         """
-        result = supabase.table(table).insert(data).execute()
+        result = get_supabase().table(table).insert(data).execute()
         if hasattr(result, "error") and result.error:
             raise Exception(f"DB insert failed: {result.error}")
         log.info(
@@ -161,6 +268,68 @@ class MessageProcessor:
             job_details["post_id"] = post_id
             await self.save_message(job_details, table="job_details")
 
+    @traced("find_post")
+    async def find_post(self, channel_id: int, message_id: int) -> Optional[dict]:
+        """
+        Looks up the stored row of a channel post.
+
+        :return: Its ``post_id``, ``image_url`` and ``source`` ("jobs" if it has
+            job details, else "base"), or None if it wasn't saved yet.
+        """
+        result = await asyncio.to_thread(
+            get_supabase()
+            .table("channels_content")
+            .select("post_id,image_url")
+            .eq("channel_id", channel_id)
+            .eq("message_id", message_id)
+            .limit(1)
+            .execute
+        )
+        if not result.data:
+            return None
+        post = result.data[0]
+        job_details = await asyncio.to_thread(
+            get_supabase()
+            .table("job_details")
+            .select("post_id")
+            .eq("post_id", post["post_id"])
+            .limit(1)
+            .execute
+        )
+        post["source"] = "jobs" if job_details.data else "base"
+        return post
+
+    @traced("upsert_message")
+    async def upsert_parsed_message(self, parsed_message: ParsedMessage, existing: Optional[dict]):
+        """
+        Saves a parsed message, or updates the rows of an already stored post in
+        place (keeping its ``post_id``) when ``existing`` comes from ``find_post``.
+
+        :param parsed_message: ParsedMessage instance.
+        :param existing: Row returned by ``find_post``, or None.
+        """
+        if existing is None:
+            await self.save_parsed_message(parsed_message)
+            return
+
+        post_id = existing["post_id"]
+        rows = [("channels_content", parsed_message.to_channels_content_dict(post_id))]
+        if parsed_message.source == "jobs":
+            rows.append(("job_details", {**parsed_message.other, "post_id": post_id}))
+        for table, data in rows:
+            result = await asyncio.to_thread(
+                get_supabase().table(table).update(data).eq("post_id", post_id).execute
+            )
+            if not result.data:
+                # e.g. a news post edited into a job post has no job_details yet
+                await asyncio.to_thread(get_supabase().table(table).insert(data).execute)
+        if parsed_message.source != "jobs":
+            # a job post edited into news must not keep its old job details
+            await asyncio.to_thread(
+                get_supabase().table("job_details").delete().eq("post_id", post_id).execute
+            )
+        log.info("Updated stored post in place: post_id=%s", post_id)
+
     async def process_message(self, message_type: str = "news"):
         """
         Complete pipeline to process a Telegram message:
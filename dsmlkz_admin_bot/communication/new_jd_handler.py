@@ -1,27 +1,42 @@
+import asyncio
+import io
 import logging
-import os
-import tempfile
+from typing import Optional
 
-from aiogram import Dispatcher, types
+from aiogram import types
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 
-from dsmlkz_admin_bot.services.hr_assistant_service import ChatGptHrAssistant
-from dsmlkz_admin_bot.services.jd_drawing_service import JobDrawer
+from configs.config import HR_ASSISTANT_BUDGET_MODE
+from dsmlkz_admin_bot.communication.router import UpdateRouter
+from dsmlkz_admin_bot.services.card_templates import get_card_templates
+from dsmlkz_admin_bot.services.drain_service import get_drain_service
+from dsmlkz_admin_bot.services.hr_assistant_service import get_hr_assistant
+from dsmlkz_admin_bot.services.jd_drawing_service import card_filename
+from dsmlkz_admin_bot.services.render_cache import (card_cache_key,
+                                                    get_render_cache)
+from dsmlkz_admin_bot.services.render_service import get_render_service
+from dsmlkz_admin_bot.services.usage_service import (BudgetExceededError,
+                                                     get_usage_tracker)
+
+AWAITING_JD = "awaiting_jd"
 
 user_states = {}
 log = logging.getLogger(__name__)
 
 
+def get_conversation_state(user_id: int) -> Optional[str]:
+    return user_states.get(user_id, {}).get("state")
+
+
 def get_job_type_keyboard():
-    return InlineKeyboardMarkup(
-        row_width=2,
-        inline_keyboard=[
-            [
-                InlineKeyboardButton(text="💻 IT Jobs", callback_data="job_type:it"),
-                InlineKeyboardButton(text="🧠 ML Jobs", callback_data="job_type:ml"),
-            ]
-        ],
+    keyboard = InlineKeyboardMarkup(row_width=2)
+    keyboard.add(
+        *(
+            InlineKeyboardButton(text=template.label, callback_data=f"job_type:{template.name}")
+            for template in get_card_templates()
+        )
     )
+    return keyboard
 
 
 async def start_new_jd(message: types.Message):
@@ -31,7 +46,7 @@ async def start_new_jd(message: types.Message):
 
 async def job_type_callback(call: types.CallbackQuery):
     job_type = call.data.split(":")[1]
-    user_states[call.from_user.id] = {"state": "awaiting_jd", "job_type": job_type}
+    user_states[call.from_user.id] = {"state": AWAITING_JD, "job_type": job_type}
     log.info("Job type selected: user=%s job_type=%s", call.from_user.id, job_type)
     await call.message.edit_reply_markup()
     await call.message.answer("Теперь пришлите описание вакансии.")
@@ -39,14 +54,12 @@ async def job_type_callback(call: types.CallbackQuery):
 
 async def handle_jd(message: types.Message):
     user_state = user_states.get(message.from_user.id, {})
-    if user_state.get("state") != "awaiting_jd":
-        return
-
     if not message.text:
         await message.reply("Пожалуйста, отправьте текст вакансии.")
         return
 
-    job_type = user_state.get("job_type", "it")
+    job_type = user_state.get("job_type", get_card_templates().default)
+    user_states.pop(message.from_user.id, None)
     log.info(
         "JD text received: user=%s type=%s text_len=%s",
         message.from_user.id,
@@ -54,55 +67,81 @@ async def handle_jd(message: types.Message):
         len(message.text),
     )
 
-    if job_type == "ml":
-        drawer = JobDrawer(
-            img_path="assets/images/ml_jobs_background_new.png",
-            font_path="assets/fonts/PressStart2P-Regular.ttf",
-            description_font_path="assets/fonts/NotoSans-Regular.ttf",
-        )
-    else:
-        drawer = JobDrawer(
-            img_path="assets/images/it_jobs_background_new.png",
-            font_path="assets/fonts/PressStart2P-Regular.ttf",
-            description_font_path="assets/fonts/NotoSans-Regular.ttf",
-        )
+    await process_jd(message, job_type)
+
+
+async def process_jd(message: types.Message, job_type: str):
+    """Generates the JD now or, over budget, rejects or queues it. Also replays journaled JDs."""
+    drain = get_drain_service()
+    try:
+        get_usage_tracker().ensure_budget(message.from_user.id)
+    except BudgetExceededError as e:
+        log.info("JD generation over budget: user=%s reason=%s", message.from_user.id, e)
+        if HR_ASSISTANT_BUDGET_MODE == "queue":
+            task = get_usage_tracker().queue_until_budget(
+                message.from_user.id, lambda: generate_jd(message, job_type)
+            )
+            drain.defer(task, "new_jd", message=message.to_python(), job_type=job_type)
+            await message.reply(f"⏳ Лимит исчерпан ({e}), вакансия в очереди.")
+        else:
+            await message.reply(f"⛔ Лимит исчерпан: {e}")
+        return
 
-    assistant = ChatGptHrAssistant(api_key=os.getenv("OPENAI_API_KEY"))
+    with drain.job("new_jd", message=message.to_python(), job_type=job_type):
+        await generate_jd(message, job_type)
+
+
+async def replay_jd(message: dict, job_type: str):
+    await process_jd(types.Message.to_object(message), job_type)
+
+
+async def generate_jd(message: types.Message, job_type: str):
+    assistant = get_hr_assistant()
 
     await message.reply("Генерирую вакансию...")
 
     try:
-        meta_info = assistant.text2dict(message.text)
+        meta_info = await asyncio.to_thread(
+            assistant.text2dict, message.text, message.from_user.id
+        )
         log.info("OpenAI meta generated: keys=%s", list(meta_info.keys()))
 
-        drawer.reset()
-        img = drawer.draw(meta_info)
+        await send_card(message, job_type, meta_info)
         meta_info = assistant.replace_markdown_symbols(meta_info)
 
-        with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tmp:
-            temp_img_path = tmp.name
-            img.save(temp_img_path)
-            log.info("Temporary JD image created at %s", temp_img_path)
-
-        try:
-            with open(temp_img_path, "rb") as photo_file:
-                await message.answer_photo(photo_file)
-        finally:
-            os.remove(temp_img_path)
-
         markdown_text = assistant.dict2markdown(meta_info)
         await message.reply(markdown_text, parse_mode="MarkdownV2")
 
     except Exception as e:
         log.exception("Error during JD generation: user=%s", message.from_user.id)
         await message.reply(f"Произошла ошибка при генерации: {e}")
-    finally:
-        user_states.pop(message.from_user.id, None)
 
 
-def register_new_jd(dp: Dispatcher):
-    dp.register_message_handler(start_new_jd, commands=["new_jd"])
-    dp.register_callback_query_handler(
-        job_type_callback, lambda c: c.data.startswith("job_type:")
+async def send_card(message: types.Message, job_type: str, meta_info: dict):
+    """Sends a known card by its Telegram file_id, otherwise renders and uploads it."""
+    cache = get_render_cache()
+    key = card_cache_key(job_type, meta_info)
+    file_id = cache.get_file_id(key)
+    if file_id:
+        try:
+            await message.answer_photo(file_id)
+            log.info("Card sent by file_id: user=%s key=%s", message.from_user.id, key[:12])
+            return
+        except Exception:
+            log.warning("Cached file_id rejected, re-uploading: key=%s", key[:12], exc_info=True)
+            cache.set_file_id(key, None)
+
+    card = await get_render_service().render(job_type, meta_info)
+    sent = await message.answer_photo(
+        types.InputFile(io.BytesIO(card), filename=card_filename())
     )
-    dp.register_message_handler(handle_jd, content_types=types.ContentTypes.TEXT)
+    if sent.photo:
+        cache.set_file_id(key, sent.photo[-1].file_id)
+
+
+def register_new_jd(router: UpdateRouter):
+    get_drain_service().register_replay("new_jd", replay_jd)
+    router.command("new_jd", start_new_jd)
+    router.callback("job_type", job_type_callback)
+    # any non-forwarded message while a JD is awaited; handle_jd asks again for non-text
+    router.message(handle_jd, state=AWAITING_JD)
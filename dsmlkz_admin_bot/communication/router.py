@@ -0,0 +1,153 @@
+"""Single entry point for messages and callback queries, dispatched by table lookup."""
+
+import logging
+from typing import Awaitable, Callable, Dict, Iterator, Optional, Tuple
+
+from aiogram import Dispatcher, types
+
+from dsmlkz_admin_bot.utils.metrics import registry
+
+log = logging.getLogger(__name__)
+
+# Matches any content type (messages) in a route key.
+ANY = "*"
+
+COMMAND, FORWARDED, MESSAGE, CALLBACK = "command", "forwarded", "message", "callback"
+CHANNEL_POST, EDITED_CHANNEL_POST = "channel_post", "edited_channel_post"
+
+Handler = Callable[..., Awaitable]
+# (conversation state or None, update kind, command / content type / callback prefix)
+RouteKey = Tuple[Optional[str], str, str]
+
+ROUTED = registry.counter(
+    "bot_routed_updates_total", "Messages and callbacks by the handler they ran.", labels=("route",)
+)
+
+
+class UpdateRouter:
+    """
+    Replaces aiogram's linear filter chain for messages and callback queries.
+    Handlers are stored under ``(state, kind, key)`` and an update is matched
+    by at most a handful of dict lookups in a fixed order, so exactly one
+    handler runs:
+
+    1. a command, first for the user's state, then in any state;
+    2. ``(state, kind, content type)``, then ``(state, kind, ANY)``;
+    3. the same without a state.
+
+    ``kind`` is ``forwarded`` for posts forwarded from a channel and
+    ``message`` otherwise. Callbacks are matched on the part of their data
+    before the first ``:`` for the user's state, then in any state. Posts in
+    channels the bot administers have no state and are matched on their
+    kind (``channel_post`` / ``edited_channel_post``) and content type.
+    """
+
+    def __init__(self, get_state: Callable[[int], Optional[str]] = lambda user_id: None):
+        self.get_state = get_state
+        self.routes: Dict[RouteKey, Handler] = {}
+
+    def _add(self, key: RouteKey, handler: Handler) -> Handler:
+        if key in self.routes:
+            raise ValueError(f"Route {key} is already handled by {self.routes[key].__name__}")
+        self.routes[key] = handler
+        return handler
+
+    def command(self, name: str, handler: Handler, state: Optional[str] = None) -> Handler:
+        return self._add((state, COMMAND, name), handler)
+
+    def message(
+        self,
+        handler: Handler,
+        content_type: str = ANY,
+        forwarded: bool = False,
+        state: Optional[str] = None,
+    ) -> Handler:
+        return self._add((state, FORWARDED if forwarded else MESSAGE, content_type), handler)
+
+    def callback(self, prefix: str, handler: Handler, state: Optional[str] = None) -> Handler:
+        return self._add((state, CALLBACK, prefix), handler)
+
+    def channel_post(
+        self, handler: Handler, content_type: str = ANY, edited: bool = False
+    ) -> Handler:
+        kind = EDITED_CHANNEL_POST if edited else CHANNEL_POST
+        return self._add((None, kind, content_type), handler)
+
+    @staticmethod
+    def _states(state: Optional[str]) -> Tuple[Optional[str], ...]:
+        return (state, None) if state is not None else (None,)
+
+    def _message_keys(self, message: types.Message, state: Optional[str]) -> Iterator[RouteKey]:
+        if message.is_command():
+            name = message.get_command(pure=True)
+            for current in self._states(state):
+                yield current, COMMAND, name
+        kind = FORWARDED if message.forward_from_chat else MESSAGE
+        for current in self._states(state):
+            yield current, kind, message.content_type
+            yield current, kind, ANY
+
+    def _callback_keys(self, call: types.CallbackQuery, state: Optional[str]) -> Iterator[RouteKey]:
+        prefix = (call.data or "").split(":", 1)[0]
+        for current in self._states(state):
+            yield current, CALLBACK, prefix
+
+    def _resolve(self, keys: Iterator[RouteKey]) -> Optional[Handler]:
+        for key in keys:
+            handler = self.routes.get(key)
+            if handler is not None:
+                return handler
+        return None
+
+    def route_message(self, message: types.Message) -> Optional[Handler]:
+        state = self.get_state(message.from_user.id) if message.from_user else None
+        return self._resolve(self._message_keys(message, state))
+
+    def route_callback(self, call: types.CallbackQuery) -> Optional[Handler]:
+        return self._resolve(self._callback_keys(call, self.get_state(call.from_user.id)))
+
+    def route_channel_post(self, message: types.Message, edited: bool = False) -> Optional[Handler]:
+        kind = EDITED_CHANNEL_POST if edited else CHANNEL_POST
+        return self._resolve(iter([(None, kind, message.content_type), (None, kind, ANY)]))
+
+    async def dispatch_message(self, message: types.Message):
+        await self._run(self.route_message(message), message)
+
+    async def dispatch_channel_post(self, message: types.Message):
+        await self._run(self.route_channel_post(message), message)
+
+    async def dispatch_edited_channel_post(self, message: types.Message):
+        await self._run(self.route_channel_post(message, edited=True), message)
+
+    @staticmethod
+    async def _run(handler: Optional[Handler], message: types.Message):
+        if handler is None:
+            ROUTED.inc(route="unmatched")
+            log.debug(
+                "No route for message: chat=%s type=%s", message.chat.id, message.content_type
+            )
+            return
+        ROUTED.inc(route=handler.__name__)
+        await handler(message)
+
+    async def dispatch_callback(self, call: types.CallbackQuery):
+        handler = self.route_callback(call)
+        if handler is None:
+            ROUTED.inc(route="unmatched")
+            log.debug("No route for callback: user=%s data=%s", call.from_user.id, call.data)
+            # e.g. a button of an outdated keyboard; unanswered, it keeps spinning
+            await call.answer()
+            return
+        ROUTED.inc(route=handler.__name__)
+        await handler(call)
+
+    def setup(self, dp: Dispatcher) -> None:
+        """Registers the router as the only message, channel post and callback query handler."""
+        dp.register_message_handler(self.dispatch_message, content_types=types.ContentTypes.ANY)
+        dp.register_channel_post_handler(
+            self.dispatch_channel_post, content_types=types.ContentTypes.ANY
+        )
+        dp.register_edited_channel_post_handler(
+            self.dispatch_edited_channel_post, content_types=types.ContentTypes.ANY
+        )
+        dp.register_callback_query_handler(self.dispatch_callback)
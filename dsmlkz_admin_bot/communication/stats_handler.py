@@ -0,0 +1,102 @@
+import logging
+
+from aiogram import Bot, types
+
+from configs.config import USER_ID
+from dsmlkz_admin_bot.communication.router import UpdateRouter
+from dsmlkz_admin_bot.services.telegram_gateway import TelegramGateway
+from dsmlkz_admin_bot.utils.tracing import find_trace, recent_traces
+
+# /traces N with N above this is an update_id
+MAX_LISTED_TRACES = 100
+MAX_MESSAGE_LENGTH = 4096
+
+log = logging.getLogger(__name__)
+
+
+def format_gateway_stats(bot: Bot) -> str:
+    if not isinstance(bot, TelegramGateway):
+        return "Telegram gateway is not enabled."
+    stats = bot.stats()
+    p50, p95 = stats["queue_wait_p50"], stats["queue_wait_p95"]
+    return "\n".join(
+        [
+            "Telegram gateway:",
+            f"queue: {stats['queue_depth']} (high={stats['queue_high']} "
+            f"normal={stats['queue_normal']} low={stats['queue_low']}), "
+            f"in flight: {stats['in_flight']}",
+            f"requests: {stats['requests']}, chats tracked: {stats['chats_tracked']}",
+            f"throttled: {stats['throttled_seconds']:.1f}s total, queue wait "
+            f"p50={p50 or 0:.3f}s p95={p95 or 0:.3f}s",
+            f"flood control: {stats['retry_after_count']} time(s), "
+            f"{stats['retry_after_seconds']:.0f}s",
+        ]
+    )
+
+
+def format_trace(trace: dict) -> str:
+    """Span tree of one trace, durations in milliseconds."""
+    lines = [
+        f"Trace {trace['trace_id']} ({trace['kind']}): "
+        f"{trace['duration'] * 1000:.0f} ms, {trace['status']}"
+    ]
+    depth = {None: 0}
+    for span in trace["spans"]:
+        depth[span["span_id"]] = depth.get(span["parent_id"], 0) + 1
+        duration = span["duration"]
+        attrs = " ".join(f"{key}={value}" for key, value in span["attrs"].items())
+        lines.append(
+            f"{'  ' * depth[span['span_id']]}{span['name']} "
+            f"+{span['start'] * 1000:.0f} ms "
+            f"{'…' if duration is None else f'{duration * 1000:.0f} ms'}"
+            f"{' ' + span['status'] if span['status'] != 'ok' else ''}"
+            f"{' ' + attrs if attrs else ''}"
+        )
+    return "\n".join(lines)
+
+
+def format_recent_traces(limit: int) -> str:
+    traces = recent_traces(limit)
+    if not traces:
+        return "No traces recorded yet."
+    lines = [f"Last {len(traces)} trace(s), newest first:"]
+    for trace in traces:
+        slowest = max(trace["spans"], key=lambda span: span["duration"] or 0, default=None)
+        lines.append(
+            f"{trace['trace_id']} {trace['kind']}: {trace['duration'] * 1000:.0f} ms, "
+            f"{len(trace['spans'])} span(s)"
+            + (
+                f", slowest {slowest['name']} {(slowest['duration'] or 0) * 1000:.0f} ms"
+                if slowest
+                else ""
+            )
+            + (f" [{trace['status']}]" if trace["status"] != "ok" else "")
+        )
+    return "\n".join(lines)
+
+
+async def traces_command(message: types.Message):
+    """/traces [count] lists recent traces, /traces <update_id> shows one of them."""
+    if message.from_user.id != USER_ID:
+        return
+    args = message.get_args().strip()
+    log.info("Traces requested: user=%s args=%s", message.from_user.id, args)
+    if args.isdigit() and int(args) > MAX_LISTED_TRACES:
+        trace = find_trace(args)
+        text = format_trace(trace) if trace else f"Trace {args} not found."
+    else:
+        limit = int(args) if args.isdigit() else 10
+        text = format_recent_traces(max(limit, 1))
+    await message.reply(text[:MAX_MESSAGE_LENGTH])
+
+
+async def gateway_stats_command(message: types.Message):
+    if message.from_user.id != USER_ID:
+        return
+    log.info("Gateway stats requested: user=%s", message.from_user.id)
+    await message.reply(format_gateway_stats(message.bot))
+
+
+def register_stats(router: UpdateRouter):
+    router.command("tg_stats", gateway_stats_command)
+    router.command("traces", traces_command)
@@ -0,0 +1,51 @@
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+from aiogram import types
+
+from configs.config import USER_ID
+from dsmlkz_admin_bot.communication.router import UpdateRouter
+from dsmlkz_admin_bot.services.usage_service import FIELDS, get_usage_tracker
+
+log = logging.getLogger(__name__)
+
+
+def format_usage(days: int = 1) -> str:
+    """Aggregates in-memory usage counters per day and user for the last ``days``."""
+    since = (datetime.now(timezone.utc) - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+    per_user = defaultdict(lambda: dict.fromkeys(FIELDS, 0))
+    for (day, user_id, _model), values in get_usage_tracker().get_usage().items():
+        if day < since:
+            continue
+        for field, value in values.items():
+            per_user[(day, user_id)][field] += value
+
+    if not per_user:
+        return f"No OpenAI usage for the last {days} day(s)."
+
+    lines = [f"OpenAI usage for the last {days} day(s):"]
+    total_cost = 0.0
+    for (day, user_id), totals in sorted(per_user.items(), reverse=True):
+        avg_latency = totals["latency"] / totals["requests"] if totals["requests"] else 0
+        total_cost += totals["cost"]
+        lines.append(
+            f"{day} user={user_id}: requests={totals['requests']} "
+            f"tokens={totals['prompt_tokens']}+{totals['completion_tokens']} "
+            f"avg_latency={avg_latency:.1f}s cost=${totals['cost']:.4f}"
+        )
+    lines.append(f"Total cost: ${total_cost:.4f}")
+    return "\n".join(lines)
+
+
+async def usage_command(message: types.Message):
+    if message.from_user.id != USER_ID:
+        return
+    args = message.get_args()
+    days = int(args) if args and args.isdigit() else 1
+    log.info("Usage report requested: user=%s days=%s", message.from_user.id, days)
+    await message.reply(format_usage(max(days, 1)))
+
+
+def register_usage(router: UpdateRouter):
+    router.command("usage", usage_command)
@@ -1,5 +1,6 @@
 from dsmlkz_admin_bot.parsing.base_parsing import BaseParsing
+from dsmlkz_admin_bot.parsing.classifier import classify_post
 from dsmlkz_admin_bot.parsing.jobs_parsing import JobsParsing
 from dsmlkz_admin_bot.parsing.parsed_message import ParsedMessage
 
-__all__ = ["JobsParsing", "BaseParsing", "ParsedMessage"]
+__all__ = ["JobsParsing", "BaseParsing", "ParsedMessage", "classify_post"]
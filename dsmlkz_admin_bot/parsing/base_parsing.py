@@ -1,6 +1,6 @@
 from abc import ABC
 
-from aiogram.types import Message
+from aiogram.types import ChatType, Message
 
 from dsmlkz_admin_bot.parsing.parsed_message import ParsedMessage
 from dsmlkz_admin_bot.utils.entities_parser import EntitiesParser
@@ -12,17 +12,24 @@ class BaseParsing(ABC):
         channel_name = ""
         channel_username = None
         forward_msg_id = message.forward_from_message_id or ""
+        channel = message.forward_from_chat
+        post_date = message.forward_date
 
-        if message.forward_from_chat:
-            channel = message.forward_from_chat
+        if channel is None and message.chat and message.chat.type == ChatType.CHANNEL:
+            # A post the bot received as a channel admin rather than a forward
+            channel = message.chat
+            forward_msg_id = message.message_id
+            post_date = message.date
+
+        if channel:
             channel_id = channel.id or ""
             channel_name = channel.title or channel.username or ""
             channel_username = channel.username
 
         # Created at — from the original post time
         created_at = (
-            message.forward_date.strftime("%Y-%m-%d %H:%M:%S")
-            if message.forward_date
+            post_date.strftime("%Y-%m-%d %H:%M:%S")
+            if post_date
             else ""
         )
 
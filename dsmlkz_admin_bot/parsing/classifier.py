@@ -0,0 +1,19 @@
+import re
+
+# A job hashtag alone is enough; otherwise two distinct job keywords are.
+JOB_HASHTAGS = re.compile(
+    r"#(vacancy|vacancies|job|jobs|hiring|вакансия|вакансии|работа)\b", re.IGNORECASE
+)
+JOB_KEYWORDS = re.compile(
+    r"\b(вакансия|зарплата|зп|salary|requirements|responsibilities|требования|"
+    r"обязанности|hiring|опыт работы|remote|удаленно|удалённо)\b",
+    re.IGNORECASE,
+)
+
+
+def classify_post(text: str) -> str:
+    """Returns "job" for posts that look like vacancies and "news" otherwise."""
+    if JOB_HASHTAGS.search(text):
+        return "job"
+    keywords = {match.lower() for match in JOB_KEYWORDS.findall(text)}
+    return "job" if len(keywords) >= 2 else "news"
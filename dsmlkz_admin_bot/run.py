@@ -1,38 +1,49 @@
+import asyncio
 import logging
 import os
 from contextlib import asynccontextmanager
 
 from aiogram import Bot, Dispatcher, types
 from aiogram.types import BotCommand
-from fastapi import FastAPI, Request
+from fastapi import APIRouter, FastAPI, Request, Response
+from fastapi.responses import JSONResponse
 
-from configs.config import BOT_TOKEN
-from dsmlkz_admin_bot.communication.message_handlers import \
-    register_message_handlers
+from configs.config import BOT_TOKEN, IMAGE_PREFETCH_MODE
+from dsmlkz_admin_bot.communication.message_handlers import (
+    register_message_handlers, run_flow_sweeper, sweep_abandoned_flows)
+from dsmlkz_admin_bot.services.card_templates import get_card_templates
+from dsmlkz_admin_bot.services.cleanup_service import get_cleanup_service
+from dsmlkz_admin_bot.services.drain_service import get_drain_service
+from dsmlkz_admin_bot.services.render_service import get_render_service
+from dsmlkz_admin_bot.services.telegram_gateway import TelegramGateway
+from dsmlkz_admin_bot.services.usage_service import get_usage_tracker
+from dsmlkz_admin_bot.services.warmup_service import WarmupService
+from dsmlkz_admin_bot.utils.metrics import registry
+from dsmlkz_admin_bot.utils.tracing import start_trace
 
-# ENV VARS
 WEBHOOK_PATH = "/webhook"
-# Prefer explicit WEBHOOK_URL, otherwise fall back to Railway-provided domains.
-webhook_origin = (
-    os.getenv("WEBHOOK_URL")
-    or os.getenv("RAILWAY_STATIC_URL")
-    or os.getenv("RAILWAY_PUBLIC_DOMAIN")
-)
-if not webhook_origin:
-    raise RuntimeError("❌ WEBHOOK_URL not set and no Railway domain env found")
-WEBHOOK_URL = (
-    webhook_origin
-    if webhook_origin.endswith(WEBHOOK_PATH)
-    else f"{webhook_origin.rstrip('/')}{WEBHOOK_PATH}"
-)
+# Set explicitly: Telegram otherwise keeps whatever list the webhook was last set with.
+ALLOWED_UPDATES = ["message", "callback_query", "channel_post", "edited_channel_post"]
 
 logger = logging.getLogger(__name__)
 
-# Bot and Dispatcher
-bot = Bot(token=BOT_TOKEN)
-Bot.set_current(bot)
-dp = Dispatcher(bot)
-register_message_handlers(dp, bot)
+router = APIRouter()
+
+
+def resolve_webhook_url() -> str:
+    # Prefer explicit WEBHOOK_URL, otherwise fall back to Railway-provided domains.
+    webhook_origin = (
+        os.getenv("WEBHOOK_URL")
+        or os.getenv("RAILWAY_STATIC_URL")
+        or os.getenv("RAILWAY_PUBLIC_DOMAIN")
+    )
+    if not webhook_origin:
+        raise RuntimeError("❌ WEBHOOK_URL not set and no Railway domain env found")
+    return (
+        webhook_origin
+        if webhook_origin.endswith(WEBHOOK_PATH)
+        else f"{webhook_origin.rstrip('/')}{WEBHOOK_PATH}"
+    )
 
 
 async def setup_bot_commands(bot: Bot):
@@ -46,24 +57,94 @@ async def setup_bot_commands(bot: Bot):
 # Lifespan handler
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    bot = app.state.bot
+    drain = get_drain_service()
+    Bot.set_current(bot)
+    webhook_url = resolve_webhook_url()
     logger.info(
         "Starting bot with webhook_url=%s port=%s",
-        WEBHOOK_URL,
+        webhook_url,
         os.getenv("PORT"),
     )
-    await bot.set_webhook(WEBHOOK_URL)
+    get_card_templates()
+    await bot.set_webhook(webhook_url, allowed_updates=ALLOWED_UPDATES)
     logger.info("🚀 Webhook set")
+    # Connections, render workers and caches warm up in the background while
+    # updates are already served; /ready reports when it is done.
+    app.state.warmup.start()
+    # Jobs cut off by the previous shutdown.
+    drain.start_replay()
+    drain.install_signal_handler()
+    # Staged photos of flows nobody finished would otherwise stay in storage.
+    sweeper = None
+    if IMAGE_PREFETCH_MODE == "upload":
+        sweeper = asyncio.create_task(run_flow_sweeper())
     yield
+    await app.state.warmup.cancel()
     await bot.delete_webhook()
+    # In-flight updates, jobs and message cleanups get SHUTDOWN_DRAIN_TIMEOUT
+    # to finish; unfinished jobs are journaled for the next start.
+    await drain.drain(get_cleanup_service(bot).wait_pending(drain.timeout))
+    if sweeper is not None:
+        sweeper.cancel()
+        # flows die with the process, so none of their staged photos is kept
+        await sweep_abandoned_flows(max_age=0)
+    # Flushes the usage counters counted since the last periodic flush.
+    await asyncio.to_thread(get_usage_tracker().close)
+    await bot.shutdown()
     logger.info("🧹 Webhook removed, closing session")
     await bot.session.close()
+    get_render_service().shutdown()
+
+
+def create_app() -> FastAPI:
+    """
+    Builds the bot, dispatcher and FastAPI app. Supabase, OpenAI and the card
+    renderer are not created here but by the warm-up ``lifespan`` starts once
+    the webhook is set, or on first use. Run with ``uvicorn --factory``.
+    """
+    bot = TelegramGateway(token=BOT_TOKEN)
+    Bot.set_current(bot)
+    dp = Dispatcher(bot)
+    register_message_handlers(dp, bot)
+
+    app = FastAPI(lifespan=lifespan)
+    app.state.bot = bot
+    app.state.dp = dp
+    app.state.warmup = WarmupService(bot)
+    app.include_router(router)
+    return app
 
-# FastAPI app
-app = FastAPI(lifespan=lifespan)
 
+def __getattr__(name: str):
+    # Keeps ``uvicorn dsmlkz_admin_bot.run:app`` working without building the
+    # app at import time.
+    if name == "app":
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-@app.post(WEBHOOK_PATH)
+
+@router.get("/metrics")
+def metrics():
+    # Sync on purpose: FastAPI renders it on its thread pool, off the event loop.
+    return Response(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+@router.get("/ready")
+def ready(req: Request):
+    report = req.app.state.warmup.report()
+    return JSONResponse(report, status_code=200 if req.app.state.warmup.ready else 503)
+
+
+@router.post(WEBHOOK_PATH)
 async def telegram_webhook(req: Request):
+    drain = get_drain_service()
+    if drain.draining:
+        # Telegram redelivers it, by then to the next instance.
+        return JSONResponse({"status": "draining"}, status_code=503)
+
     try:
         payload = await req.json()
     except Exception:
@@ -77,9 +158,27 @@ async def telegram_webhook(req: Request):
         req.headers.get("content-length"),
     )
 
+    bot, dp = req.app.state.bot, req.app.state.dp
+    Bot.set_current(bot)
+    Dispatcher.set_current(dp)
     update = types.Update(**payload)
+    kind = next((key for key in payload if key != "update_id"), "unknown")
     try:
-        await dp.process_update(update)
+        with drain.update() as in_flight:
+            try:
+                with start_trace(update.update_id, kind):
+                    await dp.process_update(update)
+            except asyncio.CancelledError:
+                if not in_flight.journaled:
+                    raise
+                # Cut off by the drain deadline with its job journaled: a 200
+                # keeps Telegram from redelivering it on top of the replay.
+                asyncio.current_task().uncancel()
+                logger.warning(
+                    "Update cut off by shutdown, job journaled: update_id=%s",
+                    update.update_id,
+                )
+                return {"status": "journaled"}
         logger.info(
             "Processed update: update_id=%s message_id=%s callback_query_id=%s",
             update.update_id,
@@ -0,0 +1,83 @@
+"""Process-wide cache of decoded card templates and fonts."""
+
+import logging
+import threading
+from typing import Callable, Dict, Iterable, Tuple
+
+from PIL import Image, ImageFont
+
+log = logging.getLogger(__name__)
+
+
+class AssetCache:
+    """
+    Keeps decoded template images and FreeType fonts in memory.
+
+    Templates are handed out as ``Image.copy()`` so drawing never touches the
+    cached original; fonts are immutable and shared as is.
+    """
+
+    def __init__(self):
+        self._images: Dict[str, Image.Image] = {}
+        self._fonts: Dict[Tuple[str, int], ImageFont.FreeTypeFont] = {}
+        # re-entrant: composing a layered image loads its base image
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_image(self, path: str) -> Image.Image:
+        return self.get_composed(path, lambda: self._open(path))
+
+    def get_composed(self, key: str, build: Callable[[], Image.Image]) -> Image.Image:
+        """Like ``get_image`` for images built in memory, e.g. layered backgrounds."""
+        image = self._images.get(key)
+        if image is None:
+            with self._lock:
+                image = self._images.get(key)
+                if image is None:
+                    image = build()
+                    self._images[key] = image
+                    self.misses += 1
+        else:
+            self.hits += 1
+        return image.copy()
+
+    @staticmethod
+    def _open(path: str) -> Image.Image:
+        image = Image.open(path)
+        image.load()
+        return image
+
+    def get_font(self, path: str, size: int) -> ImageFont.FreeTypeFont:
+        key = (path, size)
+        font = self._fonts.get(key)
+        if font is None:
+            font = ImageFont.truetype(path, size)
+            self._fonts[key] = font
+            self.misses += 1
+        else:
+            self.hits += 1
+        return font
+
+    def preload(
+        self,
+        image_paths: Iterable[str] = (),
+        font_paths: Iterable[str] = (),
+        font_sizes: Iterable[int] = (),
+    ) -> None:
+        image_paths = list(image_paths)
+        font_paths = list(font_paths)
+        font_sizes = list(font_sizes)
+        for path in image_paths:
+            self.get_image(path)
+        for path in font_paths:
+            for size in font_sizes:
+                self.get_font(path, size)
+        log.info(
+            "Preloaded assets: images=%s fonts=%s",
+            len(image_paths),
+            len(font_paths) * len(font_sizes),
+        )
+
+
+asset_cache = AssetCache()
@@ -0,0 +1,176 @@
+"""Job card templates described in YAML and compiled once into layouts."""
+
+import hashlib
+import json
+import logging
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import yaml
+from PIL import Image, ImageDraw
+
+from configs.config import CARD_TEMPLATES_PATH
+from dsmlkz_admin_bot.services.asset_cache import asset_cache
+
+# Keys of jd_drawing_service.get_drawn_fields a block can draw.
+DRAWN_FIELDS = ("position_name", "company_name", "salary", "location", "description")
+ALIGNMENTS = ("left", "right")
+
+log = logging.getLogger(__name__)
+
+Color = Tuple[int, int, int]
+
+
+@dataclass(frozen=True)
+class TextBlock:
+    """Dynamic text drawn per card, shrunk until it fits ``max_rows``."""
+
+    field: str
+    top: int
+    color: Color
+    font_path: str
+    size: int = 70
+    max_rows: int = 1
+    align: str = "left"
+
+
+@dataclass(frozen=True)
+class StaticText:
+    """Decorative text composited onto the background once."""
+
+    text: str
+    top: int
+    color: Color
+    font_path: str
+    size: int
+    align: str = "left"
+
+
+@dataclass(frozen=True)
+class CardTemplate:
+    name: str
+    label: str
+    background_path: str
+    margin: int
+    blocks: Tuple[TextBlock, ...]
+    static: Tuple[StaticText, ...] = ()
+    digest: str = field(default="", compare=False)
+
+    @property
+    def font_paths(self) -> List[str]:
+        return sorted({block.font_path for block in self.blocks + self.static})
+
+    def get_background(self) -> Image.Image:
+        """Template background with static layers, decoded and composed once per process."""
+        if not self.static:
+            return asset_cache.get_image(self.background_path)
+        return asset_cache.get_composed(f"template:{self.name}:{self.digest}", self._compose)
+
+    def _compose(self) -> Image.Image:
+        img = asset_cache.get_image(self.background_path)
+        draw = ImageDraw.Draw(img)
+        for layer in self.static:
+            font = asset_cache.get_font(layer.font_path, layer.size)
+            left = self.margin
+            if layer.align == "right":
+                left = img.size[0] - self.margin - draw.textlength(layer.text, font=font)
+            draw.text((left, layer.top), layer.text, fill=layer.color, font=font)
+        return img
+
+
+def _resolve(kind: str, name: str, registry: Dict, template: str):
+    if name not in registry:
+        raise ValueError(f"Card template {template!r}: unknown {kind} {name!r}")
+    return registry[name]
+
+
+def _align(value: str, template: str) -> str:
+    if value not in ALIGNMENTS:
+        raise ValueError(f"Card template {template!r}: align must be one of {ALIGNMENTS}")
+    return value
+
+
+def compile_templates(config: Dict) -> Dict[str, CardTemplate]:
+    """Turns the parsed YAML into ``CardTemplate`` objects, validating references."""
+    fonts = config.get("fonts") or {}
+    colors = {name: tuple(rgb) for name, rgb in (config.get("colors") or {}).items()}
+    layouts = config.get("layouts") or {}
+
+    templates = {}
+    for name, spec in (config.get("templates") or {}).items():
+        layout = _resolve("layout", spec.get("layout"), layouts, name)
+        blocks = []
+        for block in layout.get("blocks") or []:
+            if block.get("field") not in DRAWN_FIELDS:
+                raise ValueError(f"Card template {name!r}: unknown field {block.get('field')!r}")
+            blocks.append(
+                TextBlock(
+                    field=block["field"],
+                    top=int(block["top"]),
+                    color=_resolve("color", block["color"], colors, name),
+                    font_path=_resolve("font", block.get("font", "title"), fonts, name),
+                    size=int(block.get("size", 70)),
+                    max_rows=int(block.get("max_rows", 1)),
+                    align=_align(block.get("align", "left"), name),
+                )
+            )
+        static = tuple(
+            StaticText(
+                text=str(layer["text"]),
+                top=int(layer["top"]),
+                color=_resolve("color", layer["color"], colors, name),
+                font_path=_resolve("font", layer.get("font", "title"), fonts, name),
+                size=int(layer["size"]),
+                align=_align(layer.get("align", "left"), name),
+            )
+            for layer in spec.get("static") or []
+        )
+        template = CardTemplate(
+            name=name,
+            label=spec.get("label", name),
+            background_path=spec["background"],
+            margin=int(layout.get("margin", 25)),
+            blocks=tuple(blocks),
+            static=static,
+        )
+        payload = json.dumps(asdict(template), sort_keys=True, ensure_ascii=False)
+        object.__setattr__(template, "digest", hashlib.sha256(payload.encode("utf-8")).hexdigest())
+        templates[name] = template
+
+    if not templates:
+        raise ValueError("No card templates configured")
+    return templates
+
+
+class CardTemplates:
+    """Templates loaded from ``CARD_TEMPLATES_PATH`` plus the fallback one."""
+
+    def __init__(self, path: str = CARD_TEMPLATES_PATH):
+        with open(path, encoding="utf-8") as f:
+            config = yaml.safe_load(f) or {}
+        self.path = path
+        self.templates = compile_templates(config)
+        self.default = config.get("default") or next(iter(self.templates))
+        if self.default not in self.templates:
+            raise ValueError(f"Default card template {self.default!r} is not defined")
+        log.info("Loaded card templates from %s: %s", path, ", ".join(self.templates))
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.templates
+
+    def __iter__(self):
+        return iter(self.templates.values())
+
+    def get(self, name: Optional[str]) -> CardTemplate:
+        """Template by name, unknown names fall back to the default template."""
+        return self.templates.get(name, self.templates[self.default])
+
+
+_card_templates: Optional[CardTemplates] = None
+
+
+def get_card_templates() -> CardTemplates:
+    global _card_templates
+    if _card_templates is None:
+        _card_templates = CardTemplates()
+    return _card_templates
@@ -0,0 +1,131 @@
+"""Storage of posts the bot receives as a channel admin, new and edited."""
+
+import asyncio
+import logging
+from typing import Any, Dict, Optional, Set
+
+from aiogram import Bot, types
+
+from configs.config import INGEST_CHANNELS, INGEST_CONCURRENCY
+from dsmlkz_admin_bot.communication.message_processor import MessageProcessor
+from dsmlkz_admin_bot.parsing import classify_post
+from dsmlkz_admin_bot.services.drain_service import get_drain_service
+from dsmlkz_admin_bot.utils.metrics import registry
+
+log = logging.getLogger(__name__)
+
+POST_TYPES = ("job", "news", "auto")
+
+CHANNEL_POSTS = registry.counter(
+    "bot_channel_posts_total", "Channel posts ingested.", labels=("kind", "status")
+)
+
+
+def parse_channels(spec: str) -> Dict[int, str]:
+    """Parses ``INGEST_CHANNELS``: "-1001:job,-1002:auto" -> {-1001: "job", -1002: "auto"}."""
+    channels = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        channel_id, _, post_type = item.partition(":")
+        post_type = post_type.strip().lower() or "auto"
+        if post_type not in POST_TYPES:
+            raise ValueError(f"INGEST_CHANNELS: unknown post type {post_type!r} in {item!r}")
+        channels[int(channel_id)] = post_type
+    return channels
+
+
+class ChannelIngestService:
+    """
+    Parses ``channel_post`` / ``edited_channel_post`` updates from configured
+    channels and stores them in background tasks, so the webhook answers
+    right away. Rows are keyed by (channel_id, message_id): an edit updates
+    the row of its post in place, as does a post that was already forwarded
+    by hand, and a journaled post replayed after a restart.
+
+    Tasks for the same post share a lock stripe, so an edit is never stored
+    before the post it edits; there are ``concurrency`` stripes in total.
+    """
+
+    def __init__(
+        self, channels: Optional[Dict[int, str]] = None, concurrency: int = INGEST_CONCURRENCY
+    ):
+        self.channels = parse_channels(INGEST_CHANNELS) if channels is None else channels
+        self.stripes = [asyncio.Lock() for _ in range(max(concurrency, 1))]
+        self.tasks: Set[asyncio.Task] = set()
+        registry.callback(
+            "bot_channel_posts_pending",
+            "Channel posts waiting to be stored.",
+            lambda: len(self.tasks),
+        )
+
+    def enqueue(self, message: types.Message, edited: bool = False) -> Optional[asyncio.Task]:
+        kind = "edited_channel_post" if edited else "channel_post"
+        if message.chat.id not in self.channels:
+            CHANNEL_POSTS.inc(kind=kind, status="ignored")
+            log.debug("Ignoring post of a channel not ingested: chat=%s", message.chat.id)
+            return None
+        if not (message.text or message.caption):
+            # e.g. the uncaptioned photos of an album; the captioned one carries the post
+            CHANNEL_POSTS.inc(kind=kind, status="skipped")
+            return None
+        task = asyncio.create_task(self.ingest(message.to_python(), edited))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    async def ingest(self, message: Dict[str, Any], edited: bool = False) -> None:
+        # Storing is idempotent, so a post cut off by shutdown is simply replayed.
+        with get_drain_service().job("channel_post", message=message, edited=edited):
+            await self.replay(message, edited)
+
+    async def replay(self, message: Dict[str, Any], edited: bool = False) -> None:
+        post = types.Message.to_object(message)
+        kind = "edited_channel_post" if edited else "channel_post"
+        async with self.stripes[hash((post.chat.id, post.message_id)) % len(self.stripes)]:
+            try:
+                await self.store(post)
+            except Exception:
+                CHANNEL_POSTS.inc(kind=kind, status="error")
+                log.exception(
+                    "Failed to store channel post: chat=%s message_id=%s",
+                    post.chat.id,
+                    post.message_id,
+                )
+                return
+        CHANNEL_POSTS.inc(kind=kind, status="ok")
+
+    async def store(self, post: types.Message) -> None:
+        processor = MessageProcessor(Bot.get_current(), post)
+        existing = await processor.find_post(post.chat.id, post.message_id)
+        post_type = self.channels.get(post.chat.id, "auto")
+        if post_type == "auto" and existing:
+            # an edit keeps the type its post was stored with
+            post_type = "job" if existing["source"] == "jobs" else "news"
+        elif post_type == "auto":
+            post_type = classify_post(post.text or post.caption or "")
+
+        parsed = await (processor.parse_job() if post_type == "job" else processor.parse_news())
+        if existing and existing.get("image_url"):
+            # caption edits are the common case; keep the photo stored the first time
+            parsed.image_url = existing["image_url"]
+        else:
+            image_url = await processor.store_image()
+            if image_url:
+                parsed.image_url = image_url
+        await processor.upsert_parsed_message(parsed, existing)
+        log.info(
+            "Stored channel post: chat=%s message_id=%s type=%s updated=%s",
+            post.chat.id,
+            post.message_id,
+            post_type,
+            existing is not None,
+        )
+
+
+_channel_ingest_service: Optional[ChannelIngestService] = None
+
+
+def get_channel_ingest_service() -> ChannelIngestService:
+    global _channel_ingest_service
+    if _channel_ingest_service is None:
+        _channel_ingest_service = ChannelIngestService()
+    return _channel_ingest_service
@@ -0,0 +1,106 @@
+"""Concurrent, rate-limited deletion of Telegram messages."""
+
+import asyncio
+import logging
+from typing import Iterable, Optional, Set
+
+from aiogram import Bot
+from aiogram.utils.exceptions import (MessageCantBeDeleted,
+                                      MessageToDeleteNotFound, RetryAfter)
+
+from configs.config import (CLEANUP_CONCURRENCY, CLEANUP_MAX_RETRIES,
+                            CLEANUP_RATE_PER_SECOND)
+from dsmlkz_admin_bot.utils.metrics import registry
+from dsmlkz_admin_bot.utils.rate_limit import TokenBucket
+
+log = logging.getLogger(__name__)
+
+
+class MessageCleanupService:
+    """
+    Deletes batches of messages concurrently under a shared rate limit,
+    waiting out Telegram flood control. ``schedule`` runs a batch as a
+    background task so callbacks can be answered first.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        concurrency: int = CLEANUP_CONCURRENCY,
+        rate: float = CLEANUP_RATE_PER_SECOND,
+        max_retries: int = CLEANUP_MAX_RETRIES,
+    ):
+        self.bot = bot
+        self.max_retries = max_retries
+        self.bucket = TokenBucket(rate)
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.tasks: Set[asyncio.Task] = set()
+        registry.callback(
+            "cleanup_pending_batches",
+            "Message cleanups running in the background.",
+            lambda: len(self.tasks),
+        )
+
+    async def _delete(self, chat_id: int, message_id: int) -> bool:
+        for attempt in range(self.max_retries + 1):
+            async with self.semaphore:
+                await self.bucket.acquire()
+                try:
+                    await self.bot.delete_message(chat_id, message_id)
+                    return True
+                except (MessageToDeleteNotFound, MessageCantBeDeleted):
+                    return False
+                except RetryAfter as e:
+                    if attempt == self.max_retries:
+                        break
+                    retry_after = e.timeout
+            log.info(
+                "Delete throttled by Telegram: chat=%s message_id=%s retry_after=%ss",
+                chat_id,
+                message_id,
+                retry_after,
+            )
+            await asyncio.sleep(retry_after)
+        log.warning("Gave up deleting message: chat=%s message_id=%s", chat_id, message_id)
+        return False
+
+    async def delete_messages(self, chat_id: int, message_ids: Iterable[Optional[int]]) -> int:
+        """Deletes the messages concurrently, returns how many were deleted."""
+        message_ids = list(dict.fromkeys(msg_id for msg_id in message_ids if msg_id))
+        results = await asyncio.gather(
+            *(self._delete(chat_id, msg_id) for msg_id in message_ids),
+            return_exceptions=True,
+        )
+        for msg_id, result in zip(message_ids, results):
+            if isinstance(result, Exception):
+                log.warning(
+                    "Failed to delete message: chat=%s message_id=%s error=%r",
+                    chat_id,
+                    msg_id,
+                    result,
+                )
+        deleted = sum(result is True for result in results)
+        log.info("Cleaned up messages: chat=%s deleted=%s/%s", chat_id, deleted, len(message_ids))
+        return deleted
+
+    def schedule(self, chat_id: int, message_ids: Iterable[Optional[int]]) -> asyncio.Task:
+        """Runs ``delete_messages`` in the background."""
+        task = asyncio.create_task(self.delete_messages(chat_id, list(message_ids)))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    async def wait_pending(self, timeout: float = 5.0) -> None:
+        """Lets scheduled cleanups finish, e.g. before the bot session closes."""
+        if self.tasks:
+            await asyncio.wait(set(self.tasks), timeout=timeout)
+
+
+_cleanup_service: Optional[MessageCleanupService] = None
+
+
+def get_cleanup_service(bot: Bot) -> MessageCleanupService:
+    global _cleanup_service
+    if _cleanup_service is None:
+        _cleanup_service = MessageCleanupService(bot)
+    return _cleanup_service
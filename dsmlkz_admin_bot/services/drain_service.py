@@ -0,0 +1,272 @@
+"""Graceful shutdown: in-flight update tracking, a drain deadline and a replay journal."""
+
+import asyncio
+import json
+import logging
+import signal
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional
+
+from configs.config import PENDING_JOBS_PATH, SHUTDOWN_DRAIN_TIMEOUT
+from dsmlkz_admin_bot.utils.metrics import registry
+
+log = logging.getLogger(__name__)
+
+# Telegram keeps undelivered updates for a day; older jobs are not worth replaying.
+MAX_REPLAY_AGE = 24 * 60 * 60
+
+# When the journaled job being replayed was first started. Jobs journaled again
+# during its replay, also from tasks it starts, keep it so they still age out.
+_replay_origin: ContextVar[Optional[float]] = ContextVar("replay_origin", default=None)
+
+JOBS_PERSISTED = registry.counter(
+    "bot_jobs_persisted_total", "Jobs cut off by shutdown and journaled.", labels=("kind",)
+)
+JOBS_REPLAYED = registry.counter(
+    "bot_jobs_replayed_total", "Journaled jobs replayed on startup.", labels=("kind", "status")
+)
+
+
+class InFlightUpdate:
+    __slots__ = ("journaled",)
+
+    def __init__(self):
+        # set when the update's job was journaled after being cut off
+        self.journaled = False
+
+
+class DrainService:
+    """
+    Tracks webhook updates being handled and the long-running jobs they start
+    (JD generation, bulk batches, saves). Once draining, new updates are
+    refused so Telegram redelivers them later, work in flight gets until the
+    deadline to finish, and jobs still running then are cancelled and written
+    to a journal that the next start replays through ``register_replay``
+    handlers.
+    """
+
+    def __init__(self, path: str = PENDING_JOBS_PATH, timeout: float = SHUTDOWN_DRAIN_TIMEOUT):
+        self.path = Path(path)
+        self.timeout = timeout
+        self.draining = False
+        self.deadline: Optional[float] = None
+        self._updates: Dict[asyncio.Task, InFlightUpdate] = {}
+        self._jobs: Dict[asyncio.Task, Dict[str, Any]] = {}
+        self._replay_handlers: Dict[str, Callable[..., Awaitable]] = {}
+        self._replay_task: Optional[asyncio.Task] = None
+        self._cut_off_handle: Optional[asyncio.TimerHandle] = None
+        registry.callback(
+            "bot_in_flight_updates", "Webhook updates being handled.", lambda: len(self._updates)
+        )
+        registry.callback(
+            "bot_in_flight_jobs", "Long-running jobs started by updates.", lambda: len(self._jobs)
+        )
+        registry.callback("bot_draining", "1 while shutting down.", lambda: float(self.draining))
+
+    def register_replay(self, kind: str, handler: Callable[..., Awaitable]) -> None:
+        """``handler(**payload)`` re-runs a journaled job of this kind."""
+        self._replay_handlers[kind] = handler
+
+    @contextmanager
+    def update(self) -> Iterator[InFlightUpdate]:
+        """Marks the current task as handling a webhook update."""
+        task = asyncio.current_task()
+        in_flight = self._updates[task] = InFlightUpdate()
+        try:
+            yield in_flight
+        finally:
+            self._updates.pop(task, None)
+
+    @contextmanager
+    def job(self, kind: str, **payload) -> Iterator[Dict[str, Any]]:
+        """
+        Runs a replayable job in the current task. ``payload`` must be JSON
+        serializable; if the job is cancelled it is journaled with it. The
+        payload dict is yielded, so the job can record its progress in it.
+
+        A job opened inside another one in the same task (a replay, or a
+        deferred task) is not tracked again: the outer record journals the
+        task, and its payload is yielded if it is of the same kind.
+        """
+        task = asyncio.current_task()
+        outer = self._jobs.get(task)
+        if outer is not None:
+            # a deferred task that got to run is drained like any other job
+            outer["deferred"] = False
+            yield outer["payload"] if outer["kind"] == kind else payload
+            return
+        record = _record(kind, payload)
+        self._jobs[task] = record
+        try:
+            yield payload
+        except asyncio.CancelledError:
+            self._persist(record)
+            if task in self._updates:
+                self._updates[task].journaled = True
+            raise
+        finally:
+            self._jobs.pop(task, None)
+
+    def defer(self, task: asyncio.Task, kind: str, **payload) -> asyncio.Task:
+        """
+        Tracks a job waiting in the background (e.g. for the budget to reset).
+        Drain journals it right away instead of waiting for it.
+        """
+        self._jobs[task] = _record(kind, payload, deferred=True)
+        task.add_done_callback(self._deferred_done)
+        return task
+
+    def _deferred_done(self, task: asyncio.Task) -> None:
+        record = self._jobs.pop(task, None)
+        if record is not None and task.cancelled():
+            self._persist(record)
+
+    def install_signal_handler(self) -> None:
+        """
+        Starts draining as soon as SIGTERM arrives, before uvicorn waits for
+        open requests, then hands the signal on to uvicorn's own handler.
+        """
+        loop = asyncio.get_running_loop()
+        previous = signal.getsignal(signal.SIGTERM)
+
+        def handle(signum, frame):
+            loop.call_soon_threadsafe(self.begin)
+            if callable(previous):
+                previous(signum, frame)
+
+        try:
+            signal.signal(signal.SIGTERM, handle)
+        except ValueError:
+            # only the main thread may set handlers, e.g. not under a test client
+            log.debug("SIGTERM drain hook not installed: not in the main thread")
+
+    def begin(self) -> None:
+        """Refuses new updates and starts the deadline for the ones in flight."""
+        if self.draining:
+            return
+        loop = asyncio.get_running_loop()
+        self.draining = True
+        self.deadline = loop.time() + self.timeout
+        self._cut_off_handle = loop.call_later(self.timeout, self.cut_off)
+        log.info(
+            "Draining: updates=%s jobs=%s timeout=%ss",
+            len(self._updates),
+            len(self._jobs),
+            self.timeout,
+        )
+
+    def cut_off(self, deferred_only: bool = False) -> List[asyncio.Task]:
+        """Cancels unfinished work; ``job`` and ``defer`` journal what they were running."""
+        tasks = {task for task, record in self._jobs.items() if record["deferred"]}
+        if not deferred_only:
+            tasks |= set(self._updates) | set(self._jobs)
+        tasks = [task for task in tasks if not task.done() and task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        if tasks and not deferred_only:
+            log.warning("Drain deadline reached: cancelled=%s", len(tasks))
+        return tasks
+
+    async def drain(self, *waiters: Awaitable) -> None:
+        """
+        Waits until the deadline for in-flight updates, jobs and ``waiters``
+        (e.g. pending message cleanups), then cancels and journals the rest.
+        """
+        self.begin()
+        loop = asyncio.get_running_loop()
+        cancelled = self.cut_off(deferred_only=True)
+        pending = {
+            task
+            for task in set(self._updates) | set(self._jobs)
+            if not task.done() and task is not asyncio.current_task()
+        }
+        pending.update(asyncio.ensure_future(waiter) for waiter in waiters)
+        remaining = max(self.deadline - loop.time(), 0.0)
+        if pending:
+            _, pending = await asyncio.wait(pending, timeout=remaining)
+        cancelled += self.cut_off()
+        for task in pending:
+            task.cancel()
+        if cancelled:
+            # let cancelled jobs reach their journaling ``except``
+            await asyncio.wait(cancelled, timeout=1)
+        if self._cut_off_handle is not None:
+            self._cut_off_handle.cancel()
+        if self._replay_task is not None:
+            self._replay_task.cancel()
+        log.info("Drain finished: unfinished=%s journal=%s", len(cancelled), self.path)
+
+    def _persist(self, record: Dict[str, Any]) -> None:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as journal:
+                journal.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        except OSError:
+            log.exception("Failed to journal unfinished job: kind=%s", record["kind"])
+            return
+        JOBS_PERSISTED.inc(kind=record["kind"])
+        log.warning("Journaled unfinished job for replay: kind=%s", record["kind"])
+
+    def take_journal(self) -> List[Dict[str, Any]]:
+        """Reads and removes the journal, dropping records too old to replay."""
+        if not self.path.exists():
+            return []
+        records = []
+        with self.path.open(encoding="utf-8") as journal:
+            for line in journal:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    log.warning("Skipping malformed journal line: %r", line[:200])
+                    continue
+                if time.time() - record.get("created_at", 0) > MAX_REPLAY_AGE:
+                    continue
+                records.append(record)
+        self.path.unlink()
+        return records
+
+    def start_replay(self) -> asyncio.Task:
+        self._replay_task = asyncio.create_task(self.replay())
+        return self._replay_task
+
+    async def replay(self) -> None:
+        records = await asyncio.to_thread(self.take_journal)
+        if records:
+            log.info("Replaying %s journaled job(s)", len(records))
+            await asyncio.gather(*(self._replay_one(record) for record in records))
+
+    async def _replay_one(self, record: Dict[str, Any]) -> None:
+        kind = record["kind"]
+        handler = self._replay_handlers.get(kind)
+        if handler is None:
+            log.warning("No replay handler for journaled job: kind=%s", kind)
+            JOBS_REPLAYED.inc(kind=kind, status="skipped")
+            return
+        _replay_origin.set(record.get("created_at"))
+        try:
+            # journaled again if this start is cut short too
+            with self.job(kind, **record["payload"]):
+                await handler(**record["payload"])
+        except Exception:
+            log.exception("Replay failed: kind=%s", kind)
+            JOBS_REPLAYED.inc(kind=kind, status="error")
+            return
+        JOBS_REPLAYED.inc(kind=kind, status="ok")
+
+
+def _record(kind: str, payload: Dict[str, Any], deferred: bool = False) -> Dict[str, Any]:
+    created_at = _replay_origin.get() or time.time()
+    return {"kind": kind, "payload": payload, "created_at": created_at, "deferred": deferred}
+
+
+_drain_service: Optional[DrainService] = None
+
+
+def get_drain_service() -> DrainService:
+    global _drain_service
+    if _drain_service is None:
+        _drain_service = DrainService()
+    return _drain_service
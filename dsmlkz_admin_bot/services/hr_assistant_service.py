@@ -2,13 +2,53 @@
 
 import json
 import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures import wait
 from typing import Any, Dict, Optional
 
-from openai import APIStatusError, OpenAI
 import tenacity
 
-from configs.config import HR_ASSISTANT_MODEL
+from configs.config import (HR_ASSISTANT_FALLBACK_MODEL,
+                            HR_ASSISTANT_HEDGE_DELAY,
+                            HR_ASSISTANT_HEDGE_MIN_SAMPLES,
+                            HR_ASSISTANT_HEDGE_PERCENTILE,
+                            HR_ASSISTANT_MAX_HEDGES,
+                            HR_ASSISTANT_MAX_INPUT_CHARS, HR_ASSISTANT_MODEL,
+                            HR_ASSISTANT_REQUEST_TIMEOUT)
 from configs.prompts import jd2dict_prompt
+from dsmlkz_admin_bot.services.usage_service import get_usage_tracker
+from dsmlkz_admin_bot.utils.latency import get_latency_histogram
+from dsmlkz_admin_bot.utils.metrics import registry
+from dsmlkz_admin_bot.utils.text_compaction import compact_jd, estimate_tokens
+from dsmlkz_admin_bot.utils.tracing import traced
+
+# Shared by all assistants. Hedges get their own pool and slots: a losing
+# request keeps its thread until it finishes or times out, and must not hold
+# up primary requests.
+_request_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="hr-assistant")
+_hedge_executor = ThreadPoolExecutor(
+    max_workers=max(HR_ASSISTANT_MAX_HEDGES, 1), thread_name_prefix="hr-assistant-hedge"
+)
+_hedge_slots = threading.BoundedSemaphore(max(HR_ASSISTANT_MAX_HEDGES, 1))
+
+OPENAI_REQUESTS = registry.counter(
+    "openai_requests_total", "OpenAI completion requests.", labels=("model", "status")
+)
+OPENAI_SECONDS = registry.histogram(
+    "openai_request_duration_seconds", "OpenAI completion latency.", labels=("model",)
+)
+OPENAI_FAILED_SECONDS = registry.histogram(
+    "openai_failed_request_duration_seconds",
+    "Time until an OpenAI completion failed or timed out.",
+    labels=("model",),
+)
+OPENAI_TOKENS = registry.counter(
+    "openai_tokens_total", "Tokens used by OpenAI completions.", labels=("model", "kind")
+)
 
 
 class ChatGptHrAssistant:
@@ -20,12 +60,43 @@ class ChatGptHrAssistant:
         model: Optional[str] = None,
         temperature: float = 0.5,
         max_tokens: int = 512,
+        fallback_model: Optional[str] = None,
+        hedge_percentile: float = HR_ASSISTANT_HEDGE_PERCENTILE,
+        hedge_delay: float = HR_ASSISTANT_HEDGE_DELAY,
+        request_timeout: float = HR_ASSISTANT_REQUEST_TIMEOUT,
+        max_input_chars: int = HR_ASSISTANT_MAX_INPUT_CHARS,
+        system_prompt: str = jd2dict_prompt,
+        base_url: Optional[str] = None,
+        retry_wait: float = 10,
+        track_usage: bool = True,
     ):
         self.api_key = api_key
         self.temperature = temperature
         self.max_tokens = max_tokens
         self.model = model or HR_ASSISTANT_MODEL
-        self.client = OpenAI(api_key=api_key)
+        self.fallback_model = fallback_model or HR_ASSISTANT_FALLBACK_MODEL
+        self.hedge_percentile = hedge_percentile
+        self.hedge_delay = hedge_delay
+        self.request_timeout = request_timeout
+        self.max_input_chars = max_input_chars
+        self.system_prompt = system_prompt
+        self.retry_wait = retry_wait
+        self.track_usage = track_usage
+        self.base_url = base_url
+        self._client = None
+
+    @property
+    def client(self):
+        # openai is a heavy import; pay for it on the first request, not at startup.
+        if self._client is None:
+            from openai import OpenAI
+
+            self._client = OpenAI(api_key=self.api_key, base_url=self.base_url)
+        return self._client
+
+    @client.setter
+    def client(self, client) -> None:
+        self._client = client
 
     def __call__(self, job_description: str) -> str:
         meta = self.text2dict(job_description)
@@ -37,15 +108,155 @@ class ChatGptHrAssistant:
     def _is_retryable_error(exception: BaseException) -> bool:
         if isinstance(exception, ValueError):
             return True
+        from openai import APIStatusError
+
         if isinstance(exception, APIStatusError):
             return exception.status_code >= 500
         return False
 
-    def text2dict(self, user_jd: str) -> Dict[str, Any]:
-        """Returns dictionary with metadata about position."""
+    @staticmethod
+    def _is_timeout(exception: BaseException) -> bool:
+        from openai import APITimeoutError
+
+        return isinstance(exception, APITimeoutError)
+
+    def get_hedge_delay(self) -> Optional[float]:
+        """
+        Seconds to wait for the primary model before firing a hedged request.
+
+        Uses the configured percentile of the primary model latency once enough
+        samples were observed, otherwise the static ``hedge_delay``.
+        A non-positive percentile disables hedging.
+        """
+        if self.hedge_percentile <= 0:
+            return None
+        histogram = get_latency_histogram(self.model)
+        if histogram.count < HR_ASSISTANT_HEDGE_MIN_SAMPLES:
+            return self.hedge_delay
+        return min(histogram.percentile(self.hedge_percentile), self.request_timeout)
+
+    def _request_completion(
+        self, model: str, user_jd: str, user_id: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Single blocking completion call, validated and timed per model."""
+        messages = [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": user_jd},
+        ]
+        started = time.perf_counter()
+        try:
+            completion = self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=self.temperature,
+                max_tokens=self.max_tokens,
+                response_format={"type": "json_object"},
+                timeout=self.request_timeout,
+            )
+        except Exception as e:
+            elapsed = time.perf_counter() - started
+            if self._is_timeout(e):
+                # a timed-out model is slow, but fast failures (4xx, auth)
+                # would pull the hedge delay towards zero
+                get_latency_histogram(model).observe(elapsed)
+            OPENAI_REQUESTS.inc(model=model, status="error")
+            OPENAI_FAILED_SECONDS.observe(elapsed, model=model)
+            raise
+        elapsed = time.perf_counter() - started
+        get_latency_histogram(model).observe(elapsed)
+        OPENAI_REQUESTS.inc(model=model, status="ok")
+        OPENAI_SECONDS.observe(elapsed, model=model)
+        content = completion.choices[0].message.content or "{}"
+        prompt_tokens = getattr(completion.usage, "prompt_tokens", None)
+        completion_tokens = getattr(completion.usage, "completion_tokens", None)
+        logging.info(
+            "[HR Assistant] Received response: id=%s model=%s latency=%.2fs prompt_tokens=%s completion_tokens=%s",
+            completion.id,
+            model,
+            elapsed,
+            prompt_tokens,
+            completion_tokens,
+        )
+        OPENAI_TOKENS.inc(prompt_tokens or 0, model=model, kind="prompt")
+        OPENAI_TOKENS.inc(completion_tokens or 0, model=model, kind="completion")
+        if self.track_usage:
+            get_usage_tracker().record(
+                user_id, model, prompt_tokens or 0, completion_tokens or 0, elapsed
+            )
+        return self._parse_completion(content)
+
+    def _hedged_completion(
+        self, user_jd: str, user_id: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Sends the primary request and, if it is slower than the hedge delay,
+        a second one to the fallback model. The first valid JSON wins.
+        """
+        primary = _request_executor.submit(
+            self._request_completion, self.model, user_jd, user_id
+        )
+        hedge_delay = self.get_hedge_delay()
+        try:
+            return primary.result(timeout=hedge_delay)
+        except FutureTimeoutError:
+            pass
+
+        if HR_ASSISTANT_MAX_HEDGES <= 0 or not _hedge_slots.acquire(blocking=False):
+            logging.info(
+                "[HR Assistant] Primary model is slow, no hedge slot free: model=%s", self.model
+            )
+            return primary.result()
+        logging.info(
+            "[HR Assistant] Primary model is slow, hedging: model=%s fallback=%s delay=%.2fs",
+            self.model,
+            self.fallback_model,
+            hedge_delay,
+        )
+        hedge = _hedge_executor.submit(
+            self._request_completion, self.fallback_model, user_jd, user_id
+        )
+        hedge.add_done_callback(lambda _: _hedge_slots.release())
+        pending = {primary, hedge}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    # A running request can't be interrupted, its result is
+                    # dropped and request_timeout bounds how long it lingers.
+                    for other in pending:
+                        other.cancel()
+                    logging.info(
+                        "[HR Assistant] Hedge race won by %s",
+                        "primary" if future is primary else "fallback",
+                    )
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def compact(self, user_jd: str) -> str:
+        """Strips decoration and boilerplate from a raw JD to save prompt tokens."""
+        compacted = compact_jd(user_jd, max_chars=self.max_input_chars)
+        logging.info(
+            "[HR Assistant] Compacted JD: chars %s -> %s, estimated tokens %s -> %s",
+            len(user_jd),
+            len(compacted),
+            estimate_tokens(user_jd),
+            estimate_tokens(compacted),
+        )
+        return compacted
+
+    @traced("text2dict")
+    def text2dict(self, user_jd: str, user_id: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Returns dictionary with metadata about position.
+
+        :param user_id: Telegram user the usage is accounted to.
+        """
+        user_jd = self.compact(user_jd)
         for attempt in tenacity.Retrying(
             stop=tenacity.stop_after_attempt(5),
-            wait=tenacity.wait_fixed(10),
+            wait=tenacity.wait_fixed(self.retry_wait),
             retry=tenacity.retry_if_exception(self._is_retryable_error),
             reraise=True,
         ):
@@ -56,25 +267,7 @@ class ChatGptHrAssistant:
                     attempt.retry_state.attempt_number + 1,
                     len(user_jd),
                 )
-                messages = [
-                    {"role": "system", "content": jd2dict_prompt},
-                    {"role": "user", "content": user_jd},
-                ]
-                completion = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=messages,
-                    temperature=self.temperature,
-                    max_tokens=self.max_tokens,
-                    response_format={"type": "json_object"},
-                )
-                content = completion.choices[0].message.content or "{}"
-                logging.info(
-                    "[HR Assistant] Received response: id=%s prompt_tokens=%s completion_tokens=%s",
-                    completion.id,
-                    getattr(completion.usage, "prompt_tokens", None),
-                    getattr(completion.usage, "completion_tokens", None),
-                )
-                return self._parse_completion(content)
+                return self._hedged_completion(user_jd, user_id)
 
     @classmethod
     def _parse_completion(cls, content: str) -> Dict[str, Any]:
@@ -266,3 +459,17 @@ class ChatGptHrAssistant:
                 lines.append(f"📱 {telegram}")
 
         return "\n".join(lines)
+
+
+_hr_assistant: Optional[ChatGptHrAssistant] = None
+_hr_assistant_lock = threading.Lock()
+
+
+def get_hr_assistant() -> ChatGptHrAssistant:
+    """Assistant shared by the handlers, so they reuse one OpenAI client."""
+    global _hr_assistant
+    if _hr_assistant is None:
+        with _hr_assistant_lock:
+            if _hr_assistant is None:
+                _hr_assistant = ChatGptHrAssistant(api_key=os.getenv("OPENAI_API_KEY"))
+    return _hr_assistant
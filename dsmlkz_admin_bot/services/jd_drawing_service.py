@@ -1,92 +1,97 @@
 """Module for drawing job descriptions"""
 
-from collections import defaultdict
-from typing import Dict, List
+import io
+import logging
+import time
+from typing import Dict, Optional
+
+from PIL import ImageDraw
+
+from configs.config import (CARD_IMAGE_FORMAT, CARD_IMAGE_QUALITY,
+                            CARD_PNG_COMPRESS_LEVEL)
+from dsmlkz_admin_bot.services.asset_cache import asset_cache
+from dsmlkz_admin_bot.services.card_templates import (CardTemplate,
+                                                      get_card_templates)
+from dsmlkz_admin_bot.services.hr_assistant_service import ChatGptHrAssistant
+from dsmlkz_admin_bot.services.text_layout import TextLayout
 
-from PIL import Image, ImageDraw, ImageFont
+# _adaptive_draw steps font sizes down by 5 from at most 70.
+FONT_SIZES = range(5, 75, 5)
+IMAGE_FORMATS = ("png", "jpeg", "webp")
 
-from dsmlkz_admin_bot.services.hr_assistant_service import ChatGptHrAssistant
+log = logging.getLogger(__name__)
 
 
 class JobDrawer:
     """class for drawing job description image"""
 
-    def __init__(self, img_path, font_path: str, description_font_path):
-        self.img_path = img_path
-        self.img = Image.open(img_path)
+    def __init__(self, template: CardTemplate):
+        self.template = template
+        self.img = template.get_background()
 
-        self.font_path = font_path
-        self.description_font_path = description_font_path
         self.img_size = self.img.size[0]
-        self.left_margin_size = 25
-        self.yellow_color = (255, 243, 42)
-        self.blue_color = (0, 181, 201)
-        self.white_color = (255, 255, 255)
+        self.left_margin_size = template.margin
+        self.layout = TextLayout(
+            max_width=self.img_size - 2 * self.left_margin_size,
+            mode=ImageDraw.Draw(self.img).fontmode,
+        )
 
     def reset(self):
         """reset drawn image"""
-        self.img = Image.open(self.img_path)
+        self.img = self.template.get_background()
 
     def save(self, output_path: str):
         self.img.save(output_path)
 
-    def draw(self, meta_info: Dict[str, str]):
-        self._adaptive_draw(
-            meta_info["position_name"],
-            top_margin=300,
-            max_rows=2,
-            color=self.yellow_color,
-        )
-        self._adaptive_draw(
-            meta_info["company_name"],
-            top_margin=450,
-            default_size=50,
-            max_rows=1,
-            color=self.blue_color,
-        )
-
-        salary_repr = ChatGptHrAssistant.get_money_repr(meta_info)
-        location_repr = ChatGptHrAssistant.get_location_repr(meta_info)
-        location_repr = location_repr.replace("\/", "")
-        self._adaptive_draw(
-            salary_repr,
-            top_margin=550,
-            default_size=45,
-            max_rows=1,
-            color=self.yellow_color,
-        )
-        self._adaptive_draw(
-            location_repr,
-            top_margin=650,
-            default_size=35,
-            max_rows=1,
-            color=self.white_color,
-            left_alignement=False,
+    def encode(
+        self,
+        image_format: str = CARD_IMAGE_FORMAT,
+        quality: int = CARD_IMAGE_QUALITY,
+    ) -> bytes:
+        """Encodes the drawn image into an in-memory buffer."""
+        if image_format not in IMAGE_FORMATS:
+            raise ValueError(f"Unsupported card image format: {image_format}")
+        started = time.perf_counter()
+        img = self.img
+        if img.mode == "RGBA" and (
+            image_format == "jpeg" or img.getchannel("A").getextrema() == (255, 255)
+        ):
+            # Templates are opaque, the alpha channel only costs bytes.
+            img = img.convert("RGB")
+
+        buffer = io.BytesIO()
+        if image_format == "png":
+            img.save(buffer, format="PNG", compress_level=CARD_PNG_COMPRESS_LEVEL)
+        elif image_format == "jpeg":
+            img.save(buffer, format="JPEG", quality=quality, optimize=True)
+        else:
+            img.save(buffer, format="WEBP", quality=quality, method=4)
+
+        data = buffer.getvalue()
+        log.info(
+            "Encoded card: format=%s quality=%s size=%s bytes took=%.3fs",
+            image_format,
+            quality,
+            len(data),
+            time.perf_counter() - started,
         )
+        return data
 
-        description = meta_info.get("description", None)
-        if description:
-            project_details = description.get("project_details", None)
-            if project_details:
-                self._adaptive_draw(
-                    project_details,
-                    top_margin=800,
-                    default_size=35,
-                    max_rows=4,
-                    color=self.blue_color,
-                    use_default_font=False,
-                )
-            else:
-                company_details = description.get("company_details", None)
-                if company_details:
-                    self._adaptive_draw(
-                        company_details,
-                        top_margin=800,
-                        default_size=35,
-                        max_rows=4,
-                        color=self.blue_color,
-                        use_default_font=False,
-                    )
+    def draw(self, meta_info: Dict[str, str]):
+        fields = get_drawn_fields(meta_info)
+        for block in self.template.blocks:
+            text = fields[block.field]
+            if not text:
+                continue
+            self._adaptive_draw(
+                text,
+                top_margin=block.top,
+                color=block.color,
+                default_size=block.size,
+                max_rows=block.max_rows,
+                font_path=block.font_path,
+                left_alignement=block.align == "left",
+            )
         return self.img
 
     def _adaptive_draw(
@@ -94,57 +99,78 @@ class JobDrawer:
         text,
         top_margin,
         color,
+        font_path: str,
         default_size=70,
         max_rows: int = 1,
-        use_default_font=True,
         left_alignement: bool = True,
     ):
-        font_size = default_size
         draw = ImageDraw.Draw(self.img)
-
-        while True:
-            rows = self._split_by_rows(text, font_size, use_default_font)
-            if len(rows) > max_rows:
-                font_size -= 5
+        font_size, rows = self.layout.fit(
+            text,
+            lambda size: asset_cache.get_font(font_path, size),
+            default_size=default_size,
+            max_rows=max_rows,
+        )
+        font = asset_cache.get_font(font_path, font_size)
+        current_text_y = top_margin
+        for row in rows:
+            if left_alignement:
+                text_position = (self.left_margin_size, current_text_y)
             else:
-                font_path = (
-                    self.font_path if use_default_font else self.description_font_path
+                text_width = draw.textlength(row, font=font)
+                text_position = (
+                    self.img_size - self.left_margin_size - text_width,
+                    current_text_y,
                 )
-                font = ImageFont.truetype(font_path, font_size)
-                current_text_y = top_margin
-                for row in rows:
-                    if left_alignement:
-                        text_position = (self.left_margin_size, current_text_y)
-                    else:
-                        text_width = draw.textlength(row, font=font)
-                        text_position = (
-                            self.img_size - self.left_margin_size - text_width,
-                            current_text_y,
-                        )
-
-                    draw.text(text_position, row, fill=color, font=font)
-                    _, _, _, current_text_y = draw.textbbox(
-                        text_position, row, font=font
-                    )
-                return font_size
-
-    def _split_by_rows(self, text, font_size: int, use_default_font=True) -> List[str]:
-        font_path = self.font_path if use_default_font else self.description_font_path
-        font = ImageFont.truetype(font_path, font_size)
-        draw = ImageDraw.Draw(self.img)
-        max_caption_size = self.img_size - 2 * self.left_margin_size
-        text_width = draw.textlength(text, font=font)
-        if text_width < max_caption_size:
-            return [text]
-        words = text.split()
-        rows = defaultdict(str)
-        current_row = 0
-        for word in words:
-            possible_row = (rows[current_row] + " " + word).strip()
-            possible_row_size = draw.textlength(possible_row, font=font)
-            if possible_row_size < max_caption_size:
-                rows[current_row] = possible_row
-            else:
-                current_row += 1
-                rows[current_row] = word
-        return [rows[row_id] for row_id in range(len(rows))]
+
+            draw.text(text_position, row, fill=color, font=font)
+            _, _, _, current_text_y = draw.textbbox(text_position, row, font=font)
+        return font_size
+
+
+def get_drawn_fields(meta_info: Dict) -> Dict[str, Optional[str]]:
+    """Texts JobDrawer.draw puts on a card, which also identify a rendered card."""
+    description = meta_info.get("description") or {}
+    return {
+        "position_name": meta_info.get("position_name"),
+        "company_name": meta_info.get("company_name"),
+        "salary": ChatGptHrAssistant.get_money_repr(meta_info),
+        "location": ChatGptHrAssistant.get_location_repr(meta_info).replace("\\/", ""),
+        "description": description.get("project_details")
+        or description.get("company_details"),
+    }
+
+
+def preload_job_assets():
+    """
+    Composes all template backgrounds and loads their fonts once, e.g. at
+    startup or per worker.
+    """
+    templates = list(get_card_templates())
+    for template in templates:
+        template.get_background()
+    asset_cache.preload(
+        font_paths={path for template in templates for path in template.font_paths},
+        font_sizes=FONT_SIZES,
+    )
+
+
+def get_job_drawer(job_type: str) -> JobDrawer:
+    """Builds a drawer for the given template, unknown types fall back to the default."""
+    return JobDrawer(get_card_templates().get(job_type))
+
+
+def card_filename(name: str = "job", image_format: str = CARD_IMAGE_FORMAT) -> str:
+    return f"{name}.{'jpg' if image_format == 'jpeg' else image_format}"
+
+
+def render_job_card(
+    job_type: str,
+    meta_info: Dict,
+    image_format: str = CARD_IMAGE_FORMAT,
+    quality: int = CARD_IMAGE_QUALITY,
+) -> bytes:
+    """Draws and encodes a card. Picklable entry point for process pools."""
+    drawer = get_job_drawer(job_type)
+    drawer.draw(meta_info)
+    return drawer.encode(image_format, quality)
@@ -0,0 +1,125 @@
+"""In-memory cache of encoded job cards and their Telegram file ids."""
+
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from configs.config import (CARD_IMAGE_FORMAT, CARD_IMAGE_QUALITY,
+                            RENDER_CACHE_MAX_BYTES)
+from dsmlkz_admin_bot.services.card_templates import get_card_templates
+from dsmlkz_admin_bot.services.jd_drawing_service import get_drawn_fields
+from dsmlkz_admin_bot.utils.metrics import registry
+
+log = logging.getLogger(__name__)
+
+
+def card_cache_key(
+    job_type: str,
+    meta_info: Dict,
+    image_format: str = CARD_IMAGE_FORMAT,
+    quality: int = CARD_IMAGE_QUALITY,
+) -> str:
+    """Hash of everything that ends up in the card's pixels and encoding."""
+    payload = {
+        "template": get_card_templates().get(job_type).digest,
+        "fields": get_drawn_fields(meta_info),
+        "format": image_format,
+        "quality": quality,
+    }
+    encoded = json.dumps(payload, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class RenderCache:
+    """
+    LRU of encoded cards bounded by total size in bytes. Each entry can also
+    remember the ``file_id`` Telegram assigned on the first upload, so repeats
+    are sent without rendering or uploading anything.
+    """
+
+    def __init__(self, max_bytes: int = RENDER_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        # key -> {"card": bytes, "file_id": Optional[str]}
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._register_metrics()
+
+    def _register_metrics(self) -> None:
+        registry.callback(
+            "render_cache_hits_total", "Render cache hits.", lambda: self.hits, kind="counter"
+        )
+        registry.callback(
+            "render_cache_misses_total", "Render cache misses.", lambda: self.misses, kind="counter"
+        )
+        registry.callback("render_cache_hit_ratio", "Render cache hit ratio.", self.hit_ratio)
+        registry.callback("render_cache_bytes", "Encoded cards held in memory.", lambda: self.size)
+
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry["card"]
+
+    def put(self, key: str, card: bytes) -> None:
+        if len(card) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous["card"])
+            self._entries[key] = {
+                "card": card,
+                "file_id": previous["file_id"] if previous else None,
+            }
+            self.size += len(card)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted["card"])
+
+    def get_file_id(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry["file_id"] is None:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry["file_id"]
+
+    def set_file_id(self, key: str, file_id: Optional[str]) -> None:
+        """Remembers (or with ``None`` forgets) the uploaded photo for a card."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry["file_id"] = file_id
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+_render_cache: Optional[RenderCache] = None
+
+
+def get_render_cache() -> RenderCache:
+    global _render_cache
+    if _render_cache is None:
+        _render_cache = RenderCache()
+    return _render_cache
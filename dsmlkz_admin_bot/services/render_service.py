@@ -0,0 +1,153 @@
+"""Card rendering off the event loop in a warm process pool."""
+
+import asyncio
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from configs.config import CARD_IMAGE_FORMAT, RENDER_POOL_SIZE
+from dsmlkz_admin_bot.services.jd_drawing_service import (preload_job_assets,
+                                                          render_job_card)
+from dsmlkz_admin_bot.services.render_cache import (card_cache_key,
+                                                    get_render_cache)
+from dsmlkz_admin_bot.utils.latency import get_latency_histogram
+from dsmlkz_admin_bot.utils.logger import setup_logging
+from dsmlkz_admin_bot.utils.metrics import registry
+from dsmlkz_admin_bot.utils.tracing import record_span, span
+
+log = logging.getLogger(__name__)
+
+
+def _init_worker():
+    # Importing the package set up logging to logs/bot.log as well; only the
+    # parent writes and rotates that file, workers log to stdout.
+    setup_logging(to_file=False)
+    preload_job_assets()
+
+
+def _warm_up_worker(_index: int) -> int:
+    # Holding the worker briefly makes the pool hand the next task to another one.
+    time.sleep(0.1)
+    return multiprocessing.current_process().pid
+
+
+def _render_in_worker(
+    job_type: str, meta_info: Dict, image_format: str
+) -> Tuple[bytes, float, float]:
+    started_at = time.time()
+    card = render_job_card(job_type, meta_info, image_format)
+    return card, started_at, time.time() - started_at
+
+
+class CardRenderService:
+    """
+    Runs JobDrawer in a pool of worker processes with templates and fonts
+    preloaded once per worker, and hands encoded cards back to async handlers.
+    """
+
+    def __init__(self, pool_size: int = RENDER_POOL_SIZE):
+        self.pool_size = pool_size
+        self.pool: Optional[ProcessPoolExecutor] = None
+        self.in_flight = 0
+        self.queue_wait = get_latency_histogram("render_queue_wait")
+        self.render_time = get_latency_histogram("render_time")
+        self._lock = threading.Lock()
+        registry.callback(
+            "render_pool_size", "Card render worker processes.", lambda: self.pool_size
+        )
+        registry.callback(
+            "render_in_flight", "Cards queued or rendering in the pool.", lambda: self.in_flight
+        )
+
+    def start(self) -> None:
+        """Spawns the workers and waits until each one has preloaded its assets."""
+        with self._lock:
+            if self.pool is not None:
+                return
+            # spawn: forking a process that already runs threads is not safe
+            self.pool = ProcessPoolExecutor(
+                max_workers=self.pool_size,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+            pids = set()
+            for _ in range(20):
+                pids.update(self.pool.map(_warm_up_worker, range(self.pool_size)))
+                if len(pids) >= self.pool_size:
+                    break
+        log.info("Render pool started: size=%s workers=%s", self.pool_size, len(pids))
+
+    async def render(
+        self, job_type: str, meta_info: Dict, image_format: str = CARD_IMAGE_FORMAT
+    ) -> bytes:
+        """Returns the card encoded as ``image_format``, cached by its drawn fields."""
+        with span("render_card", job_type=job_type, format=image_format) as current:
+            cache = get_render_cache()
+            key = card_cache_key(job_type, meta_info, image_format)
+            card = cache.get(key)
+            if card is not None:
+                log.info(
+                    "Card cache hit: type=%s format=%s key=%s", job_type, image_format, key[:12]
+                )
+                if current:
+                    current.attrs["cache_hit"] = True
+                return card
+
+            if self.pool is None:
+                await asyncio.to_thread(self.start)
+
+            loop = asyncio.get_running_loop()
+            submitted_at = time.time()
+            self.in_flight += 1
+            try:
+                card, started_at, render_seconds = await loop.run_in_executor(
+                    self.pool, _render_in_worker, job_type, meta_info, image_format
+                )
+            finally:
+                self.in_flight -= 1
+
+            queue_wait = max(started_at - submitted_at, 0.0)
+            self.queue_wait.observe(queue_wait)
+            self.render_time.observe(render_seconds)
+            record_span("draw_card", render_seconds, queue_wait=round(queue_wait, 4))
+            log.info(
+                "Card rendered: type=%s format=%s size=%s bytes queue_wait=%.3fs render=%.3fs in_flight=%s",
+                job_type,
+                image_format,
+                len(card),
+                queue_wait,
+                render_seconds,
+                self.in_flight,
+            )
+            cache.put(key, card)
+            return card
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        return {
+            "pool_size": self.pool_size,
+            "in_flight": self.in_flight,
+            "queue_wait_p50": self.queue_wait.percentile(50),
+            "queue_wait_p95": self.queue_wait.percentile(95),
+            "render_p50": self.render_time.percentile(50),
+            "render_p95": self.render_time.percentile(95),
+            **{f"cache_{name}": value for name, value in get_render_cache().stats().items()},
+        }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self.pool is not None:
+                self.pool.shutdown(wait=True, cancel_futures=True)
+                self.pool = None
+
+
+_render_service: Optional[CardRenderService] = None
+
+
+def get_render_service() -> CardRenderService:
+    global _render_service
+    if _render_service is None:
+        _render_service = CardRenderService()
+    return _render_service
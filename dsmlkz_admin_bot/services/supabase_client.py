@@ -0,0 +1,28 @@
+"""Shared Supabase client, created on first use."""
+
+import logging
+import threading
+
+from configs.config import SUPABASE_KEY, SUPABASE_URL
+
+log = logging.getLogger(__name__)
+
+_supabase = None
+_supabase_lock = threading.Lock()
+
+
+def get_supabase():
+    """
+    Returns the process-wide ``supabase.Client``. The SDK (and its httpx/postgrest
+    stack) is imported here rather than at module import, so processes that never
+    touch Supabase (scripts, render workers) don't pay for it.
+    """
+    global _supabase
+    if _supabase is None:
+        with _supabase_lock:
+            if _supabase is None:
+                from supabase import create_client
+
+                _supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+                log.info("Supabase client created: url=%s", SUPABASE_URL)
+    return _supabase
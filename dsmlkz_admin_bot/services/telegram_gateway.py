@@ -0,0 +1,276 @@
+"""Outbound Telegram API gateway with flood-control scheduling."""
+
+import asyncio
+import bisect
+import itertools
+import logging
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from aiogram import Bot
+from aiogram.utils.exceptions import RetryAfter
+
+from configs.config import (TELEGRAM_CHAT_BURST, TELEGRAM_CHAT_RATE,
+                            TELEGRAM_GLOBAL_RATE, TELEGRAM_MAX_RETRIES)
+from dsmlkz_admin_bot.utils.latency import get_latency_histogram
+from dsmlkz_admin_bot.utils.metrics import registry
+from dsmlkz_admin_bot.utils.rate_limit import TokenBucket
+from dsmlkz_admin_bot.utils.tracing import Span, span
+
+HIGH, NORMAL, LOW = 0, 1, 2
+PRIORITY_NAMES = {HIGH: "high", NORMAL: "normal", LOW: "low"}
+METHOD_PRIORITIES = {
+    "answerCallbackQuery": HIGH,
+    "deleteMessage": LOW,
+}
+# Setup calls that are never part of a burst.
+UNTHROTTLED_METHODS = {
+    "getMe",
+    "setWebhook",
+    "deleteWebhook",
+    "getWebhookInfo",
+    "setMyCommands",
+    "deleteMyCommands",
+    "close",
+    "logOut",
+}
+MAX_IDLE_CHAT_BUCKETS = 10_000
+
+log = logging.getLogger(__name__)
+
+
+def method_priority(method: str) -> int:
+    """User-facing replies first, deletions last, everything else in between."""
+    if method in METHOD_PRIORITIES:
+        return METHOD_PRIORITIES[method]
+    if method.startswith(("send", "edit")):
+        return HIGH
+    return NORMAL
+
+
+def is_chat_limited(method: str) -> bool:
+    """Methods that post into a chat and count against its per-chat limit."""
+    return method.startswith("send") or method in ("forwardMessage", "copyMessage")
+
+
+@dataclass(order=True)
+class _Ticket:
+    priority: int
+    seq: int
+    chat_id: Any = field(compare=False)
+    enqueued_at: float = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+
+
+class TelegramGateway(Bot):
+    """
+    ``Bot`` whose API calls are scheduled instead of sent right away: a global
+    token bucket caps the bot's request rate, per-chat buckets cap messages
+    sent into one chat, waiting calls are served by priority and ``RetryAfter``
+    pauses the affected bucket and retries the call.
+    """
+
+    def __init__(
+        self,
+        token: str,
+        global_rate: float = TELEGRAM_GLOBAL_RATE,
+        chat_rate: float = TELEGRAM_CHAT_RATE,
+        chat_burst: float = TELEGRAM_CHAT_BURST,
+        max_retries: int = TELEGRAM_MAX_RETRIES,
+        **kwargs,
+    ):
+        super().__init__(token, **kwargs)
+        self.global_bucket = TokenBucket(global_rate)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.chat_buckets: Dict[Any, TokenBucket] = {}
+        self.max_retries = max_retries
+
+        self._queue: List[_Ticket] = []
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._scheduler: Optional[asyncio.Task] = None
+
+        self.in_flight = 0
+        self.requests = Counter()
+        self.retry_after_count = 0
+        self.retry_after_seconds = 0.0
+        self.throttled_seconds = 0.0
+        self.queue_wait = get_latency_histogram("telegram_queue_wait")
+        self._register_metrics()
+
+    def _register_metrics(self) -> None:
+        registry.callback(
+            "telegram_queue_depth",
+            "Telegram API calls waiting for their turn.",
+            lambda: {(name,): depth for name, depth in self.queue_depths().items()},
+            labels=("priority",),
+        )
+        registry.callback(
+            "telegram_in_flight", "Telegram API calls in flight.", lambda: self.in_flight
+        )
+        registry.callback(
+            "telegram_throttled_seconds_total",
+            "Time Telegram API calls spent queued.",
+            lambda: self.throttled_seconds,
+            kind="counter",
+        )
+        registry.callback(
+            "telegram_retry_after_total",
+            "Flood control (RetryAfter) responses.",
+            lambda: self.retry_after_count,
+            kind="counter",
+        )
+
+    async def request(self, method, data=None, files=None, **kwargs):
+        self.requests[method] += 1
+        with span(f"telegram.{method}") as current:
+            if method in UNTHROTTLED_METHODS:
+                return await super().request(method, data, files, **kwargs)
+            return await self._scheduled_request(method, data, files, current, **kwargs)
+
+    async def _scheduled_request(self, method, data, files, current: Optional[Span], **kwargs):
+        priority = method_priority(method)
+        chat_id = (data or {}).get("chat_id") if is_chat_limited(method) else None
+        for attempt in range(self.max_retries + 1):
+            waited = await self._wait_turn(priority, chat_id)
+            if current:
+                current.attrs["queue_wait"] = round(
+                    current.attrs.get("queue_wait", 0.0) + waited, 4
+                )
+                current.attrs["attempts"] = attempt + 1
+            self.in_flight += 1
+            try:
+                return await super().request(method, data, files, **kwargs)
+            except RetryAfter as e:
+                self.retry_after_count += 1
+                self.retry_after_seconds += e.timeout
+                bucket = self._chat_bucket(chat_id) if chat_id is not None else self.global_bucket
+                bucket.pause(e.timeout)
+                log.warning(
+                    "Telegram flood control: method=%s chat=%s retry_after=%ss attempt=%s",
+                    method,
+                    chat_id,
+                    e.timeout,
+                    attempt + 1,
+                )
+                if attempt == self.max_retries:
+                    raise
+                _rewind(files)
+            finally:
+                self.in_flight -= 1
+
+    async def _wait_turn(self, priority: int, chat_id: Any) -> float:
+        ticket = _Ticket(
+            priority=priority,
+            seq=next(self._seq),
+            chat_id=chat_id,
+            enqueued_at=time.monotonic(),
+            future=asyncio.get_running_loop().create_future(),
+        )
+        bisect.insort(self._queue, ticket)
+        if self._scheduler is None or self._scheduler.done():
+            self._scheduler = asyncio.create_task(self._schedule())
+        self._wakeup.set()
+
+        await ticket.future
+        waited = time.monotonic() - ticket.enqueued_at
+        self.throttled_seconds += waited
+        self.queue_wait.observe(waited)
+        return waited
+
+    def _chat_bucket(self, chat_id: Any) -> TokenBucket:
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            if len(self.chat_buckets) >= MAX_IDLE_CHAT_BUCKETS:
+                # full buckets carry no state worth keeping
+                self.chat_buckets = {
+                    key: value
+                    for key, value in self.chat_buckets.items()
+                    if value.delay(value.capacity) > 0
+                }
+            bucket = self.chat_buckets[chat_id] = TokenBucket(
+                self.chat_rate, capacity=self.chat_burst
+            )
+        return bucket
+
+    def _grant_next(self) -> float:
+        """
+        Releases the most urgent ticket whose chat can send now. Returns 0 if
+        one was released, otherwise how long until some chat frees up.
+        """
+        wait = None
+        for index, ticket in enumerate(self._queue):
+            if ticket.future.done():
+                # the caller was cancelled while queued
+                del self._queue[index]
+                return 0.0
+            if ticket.chat_id is not None:
+                chat_bucket = self._chat_bucket(ticket.chat_id)
+                chat_delay = chat_bucket.delay()
+                if chat_delay > 0:
+                    wait = chat_delay if wait is None else min(wait, chat_delay)
+                    continue
+                chat_bucket.reserve()
+            self.global_bucket.reserve()
+            del self._queue[index]
+            ticket.future.set_result(None)
+            return 0.0
+        return wait
+
+    async def _schedule(self) -> None:
+        while True:
+            if not self._queue:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            delay = self.global_bucket.delay()
+            if delay <= 0:
+                delay = self._grant_next()
+                if delay == 0:
+                    continue
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def queue_depths(self) -> Dict[str, int]:
+        depths = dict.fromkeys(PRIORITY_NAMES.values(), 0)
+        for ticket in list(self._queue):
+            depths[PRIORITY_NAMES[ticket.priority]] += 1
+        return depths
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": len(self._queue),
+            **{f"queue_{name}": depth for name, depth in self.queue_depths().items()},
+            "in_flight": self.in_flight,
+            "requests": sum(self.requests.values()),
+            "throttled_seconds": self.throttled_seconds,
+            "queue_wait_p50": self.queue_wait.percentile(50),
+            "queue_wait_p95": self.queue_wait.percentile(95),
+            "retry_after_count": self.retry_after_count,
+            "retry_after_seconds": self.retry_after_seconds,
+            "chats_tracked": len(self.chat_buckets),
+        }
+
+    async def shutdown(self) -> None:
+        """Stops the scheduler; calls still queued are cancelled."""
+        if self._scheduler is not None:
+            self._scheduler.cancel()
+            await asyncio.gather(self._scheduler, return_exceptions=True)
+            self._scheduler = None
+        for ticket in self._queue:
+            ticket.future.cancel()
+        self._queue.clear()
+
+
+def _rewind(files: Optional[Dict]) -> None:
+    # A retried upload must send the file from the start again.
+    for value in (files or {}).values():
+        file = getattr(value, "file", None)
+        if file is not None and hasattr(file, "seek"):
+            file.seek(0)
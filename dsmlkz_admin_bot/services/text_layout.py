@@ -0,0 +1,102 @@
+"""Row wrapping and adaptive font sizing for card text blocks."""
+
+import bisect
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from PIL import ImageFont
+
+# (font path, font size, font mode, text) -> width in pixels
+_widths: Dict[Tuple[str, int, str, str], float] = {}
+MAX_CACHED_WIDTHS = 100_000
+
+
+def measure(font: ImageFont.FreeTypeFont, text: str, mode: str = "L") -> float:
+    """Memoized ``ImageDraw.textlength`` for a font (``mode`` is the draw fontmode)."""
+    key = (font.path, font.size, mode, text)
+    width = _widths.get(key)
+    if width is None:
+        if len(_widths) >= MAX_CACHED_WIDTHS:
+            _widths.clear()
+        width = _widths[key] = font.getlength(text, mode)
+    return width
+
+
+class TextLayout:
+    """
+    Greedy word wrapping equivalent to measuring every row prefix, but driven
+    by cumulative per-word widths: each row end is guessed from the prefix sums
+    and confirmed with one or two exact measurements, so a row costs O(1)
+    ``textlength`` calls instead of one per word.
+    """
+
+    def __init__(self, max_width: float, mode: str = "L"):
+        self.max_width = max_width
+        self.mode = mode
+
+    def _fits(self, font, words: Sequence[str], start: int, end: int) -> bool:
+        return measure(font, " ".join(words[start : end + 1]), self.mode) < self.max_width
+
+    def split_by_rows(self, text: str, font: ImageFont.FreeTypeFont) -> List[str]:
+        if measure(font, text, self.mode) < self.max_width:
+            return [text]
+
+        words = text.split()
+        if not words:
+            return []
+        space = measure(font, " ", self.mode)
+        # joined[i]: estimated width of words[0..i] joined with spaces
+        joined = []
+        total = 0.0
+        for index, word in enumerate(words):
+            total += measure(font, word, self.mode) + (space if index else 0.0)
+            joined.append(total)
+
+        rows = []
+        start = 0
+        # A first word that doesn't fit leaves an empty first row, like the
+        # original prefix loop did.
+        if not self._fits(font, words, 0, 0):
+            rows.append("")
+        while start < len(words):
+            offset = joined[start - 1] + space if start else 0.0
+            end = bisect.bisect_left(joined, self.max_width + offset, lo=start) - 1
+            end = max(end, start)
+            while end > start and not self._fits(font, words, start, end):
+                end -= 1
+            while end + 1 < len(words) and self._fits(font, words, start, end + 1):
+                end += 1
+            rows.append(" ".join(words[start : end + 1]))
+            start = end + 1
+        return rows
+
+    def fit(
+        self,
+        text: str,
+        get_font: Callable[[int], ImageFont.FreeTypeFont],
+        default_size: int,
+        max_rows: int,
+        step: int = 5,
+    ) -> Tuple[int, List[str]]:
+        """
+        Largest size in ``default_size, default_size - step, ...`` whose
+        wrapping has at most ``max_rows`` rows, found by binary search.
+        """
+        rows = self.split_by_rows(text, get_font(default_size))
+        if len(rows) <= max_rows:
+            return default_size, rows
+
+        sizes = list(range(default_size, 0, -step))
+        low, high = 1, len(sizes) - 1
+        best = None
+        while low <= high:
+            middle = (low + high) // 2
+            candidate_rows = self.split_by_rows(text, get_font(sizes[middle]))
+            if len(candidate_rows) <= max_rows:
+                best = (sizes[middle], candidate_rows)
+                high = middle - 1
+            else:
+                low = middle + 1
+        if best is None:
+            size = sizes[-1]
+            return size, self.split_by_rows(text, get_font(size))
+        return best
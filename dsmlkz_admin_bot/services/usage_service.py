@@ -0,0 +1,216 @@
+"""Per-user and per-day OpenAI usage counters with daily budgets."""
+
+import asyncio
+import logging
+import sqlite3
+import threading
+from contextlib import closing
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from configs.config import (HR_ASSISTANT_DAILY_COST_BUDGET,
+                            HR_ASSISTANT_DAILY_TOKEN_BUDGET,
+                            HR_ASSISTANT_PRICES, USAGE_DB_PATH)
+from dsmlkz_admin_bot.utils.metrics import registry
+
+log = logging.getLogger(__name__)
+
+# requests, prompt_tokens, completion_tokens, latency_seconds, cost_usd
+FIELDS = ("requests", "prompt_tokens", "completion_tokens", "latency", "cost")
+UsageKey = Tuple[str, int, str]  # (day, user_id, model)
+
+
+class BudgetExceededError(Exception):
+    pass
+
+
+def _today() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    prompt_price, completion_price = HR_ASSISTANT_PRICES.get(model, (0.0, 0.0))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1e6
+
+
+class UsageTracker:
+    """
+    Keeps usage counters in memory and persists changed rows to SQLite from a
+    background thread, so ``record`` is a couple of dict updates on the
+    request path and ``/usage`` never touches logs.
+    """
+
+    def __init__(self, db_path: str = USAGE_DB_PATH, flush_interval: float = 5.0):
+        self.db_path = Path(db_path)
+        self.flush_interval = flush_interval
+        self._totals: Dict[UsageKey, List[float]] = {}
+        self._dirty: set = set()
+        self._lock = threading.Lock()
+        self._pending_tasks: set = set()
+        registry.callback(
+            "openai_budget_queue_depth",
+            "Generations waiting for a user's daily budget to reset.",
+            lambda: len(self._pending_tasks),
+        )
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS usage (
+                    day TEXT NOT NULL,
+                    user_id INTEGER NOT NULL,
+                    model TEXT NOT NULL,
+                    requests INTEGER NOT NULL,
+                    prompt_tokens INTEGER NOT NULL,
+                    completion_tokens INTEGER NOT NULL,
+                    latency REAL NOT NULL,
+                    cost REAL NOT NULL,
+                    PRIMARY KEY (day, user_id, model)
+                )
+                """
+            )
+            since = (datetime.now(timezone.utc) - timedelta(days=31)).strftime("%Y-%m-%d")
+            for row in conn.execute(
+                f"SELECT day, user_id, model, {', '.join(FIELDS)} FROM usage WHERE day >= ?",
+                (since,),
+            ):
+                self._totals[tuple(row[:3])] = list(row[3:])
+
+        self._flusher = threading.Thread(
+            target=self._flush_loop, name="usage-flusher", daemon=True
+        )
+        self._stop = threading.Event()
+        self._flusher.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path)
+
+    def record(
+        self,
+        user_id: Optional[int],
+        model: str,
+        prompt_tokens: int,
+        completion_tokens: int,
+        latency: float,
+    ) -> None:
+        key = (_today(), user_id or 0, model)
+        cost = estimate_cost(model, prompt_tokens, completion_tokens)
+        with self._lock:
+            totals = self._totals.setdefault(key, [0, 0, 0, 0.0, 0.0])
+            totals[0] += 1
+            totals[1] += prompt_tokens
+            totals[2] += completion_tokens
+            totals[3] += latency
+            totals[4] += cost
+            self._dirty.add(key)
+
+    def get_usage(
+        self, day: Optional[str] = None, user_id: Optional[int] = None
+    ) -> Dict[Tuple[str, int, str], Dict[str, float]]:
+        """Returns counters filtered by day and/or user from memory."""
+        with self._lock:
+            items = [(key, list(values)) for key, values in self._totals.items()]
+        return {
+            key: dict(zip(FIELDS, values))
+            for key, values in items
+            if (day is None or key[0] == day) and (user_id is None or key[1] == user_id)
+        }
+
+    def get_user_day_totals(self, user_id: int, day: Optional[str] = None) -> Dict[str, float]:
+        totals = dict.fromkeys(FIELDS, 0)
+        for values in self.get_usage(day or _today(), user_id).values():
+            for field, value in values.items():
+                totals[field] += value
+        return totals
+
+    def ensure_budget(self, user_id: int) -> None:
+        """Raises BudgetExceededError if the user is over today's budget."""
+        reason = self.check_budget(user_id)
+        if reason:
+            raise BudgetExceededError(reason)
+
+    def check_budget(self, user_id: int) -> Optional[str]:
+        """Returns the reason if the user is over today's budget, else None."""
+        totals = self.get_user_day_totals(user_id)
+        tokens = totals["prompt_tokens"] + totals["completion_tokens"]
+        if HR_ASSISTANT_DAILY_TOKEN_BUDGET and tokens >= HR_ASSISTANT_DAILY_TOKEN_BUDGET:
+            return f"daily token budget exceeded ({tokens}/{HR_ASSISTANT_DAILY_TOKEN_BUDGET})"
+        if HR_ASSISTANT_DAILY_COST_BUDGET and totals["cost"] >= HR_ASSISTANT_DAILY_COST_BUDGET:
+            return (
+                f"daily cost budget exceeded "
+                f"(${totals['cost']:.4f}/${HR_ASSISTANT_DAILY_COST_BUDGET:.2f})"
+            )
+        return None
+
+    async def wait_for_budget(self, user_id: int) -> None:
+        """Sleeps until the next UTC day for as long as the user is over budget."""
+        while self.check_budget(user_id):
+            now = datetime.now(timezone.utc)
+            next_day = (now + timedelta(days=1)).replace(
+                hour=0, minute=0, second=0, microsecond=0
+            )
+            await asyncio.sleep((next_day - now).total_seconds() + 1)
+
+    def queue_until_budget(
+        self, user_id: int, start: Callable[[], Awaitable]
+    ) -> asyncio.Task:
+        """
+        Runs ``start()`` in the background once the user's budget resets. A
+        factory rather than a coroutine, so a task cancelled while waiting
+        leaves no coroutine that is never awaited.
+        """
+
+        async def run():
+            await self.wait_for_budget(user_id)
+            await start()
+
+        task = asyncio.create_task(run())
+        self._pending_tasks.add(task)
+        task.add_done_callback(self._pending_tasks.discard)
+        return task
+
+    def flush(self) -> None:
+        with self._lock:
+            rows = [(*key, *self._totals[key]) for key in self._dirty]
+            self._dirty.clear()
+        if not rows:
+            return
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.executemany(
+                    f"""
+                    INSERT INTO usage (day, user_id, model, {', '.join(FIELDS)})
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (day, user_id, model) DO UPDATE SET
+                    {', '.join(f'{field} = excluded.{field}' for field in FIELDS)}
+                    """,
+                    rows,
+                )
+        except sqlite3.Error:
+            log.exception("Failed to persist usage counters: rows=%s", len(rows))
+            with self._lock:
+                self._dirty.update(tuple(row[:3]) for row in rows)
+
+    def _flush_loop(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+        self.flush()
+
+    def close(self) -> None:
+        self._stop.set()
+        self._flusher.join(timeout=self.flush_interval + 1)
+
+
+_tracker: Optional[UsageTracker] = None
+_tracker_lock = threading.Lock()
+
+
+def get_usage_tracker() -> UsageTracker:
+    global _tracker
+    if _tracker is None:
+        with _tracker_lock:
+            if _tracker is None:
+                _tracker = UsageTracker()
+    return _tracker
@@ -0,0 +1,110 @@
+"""Background warm-up of connections, render workers and caches after startup."""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from aiogram import Bot
+
+from configs.config import SUPABASE_BUCKET, WARMUP_STEP_TIMEOUT
+from dsmlkz_admin_bot.services.hr_assistant_service import get_hr_assistant
+from dsmlkz_admin_bot.services.render_cache import get_render_cache
+from dsmlkz_admin_bot.services.render_service import get_render_service
+from dsmlkz_admin_bot.services.supabase_client import get_supabase
+from dsmlkz_admin_bot.services.usage_service import get_usage_tracker
+from dsmlkz_admin_bot.utils.metrics import registry
+
+log = logging.getLogger(__name__)
+
+
+def _warm_openai() -> None:
+    # Cheap authenticated GET that leaves a TLS connection in the client's pool.
+    assistant = get_hr_assistant()
+    assistant.client.models.retrieve(assistant.model)
+
+
+def _warm_supabase() -> None:
+    client = get_supabase()
+    client.storage.get_bucket(SUPABASE_BUCKET)
+    client.table("channels_content").select("*").limit(1).execute()
+
+
+class WarmupService:
+    """
+    Runs independent warm-up steps concurrently in a background task. A failed
+    or slow step is logged and recorded, never raised: everything it warms is
+    also created on first use, warm-up only moves that cost off the first user.
+    """
+
+    def __init__(self, bot: Bot, step_timeout: float = WARMUP_STEP_TIMEOUT):
+        self.bot = bot
+        self.step_timeout = step_timeout
+        self.steps: Dict[str, Dict[str, Any]] = {}
+        self.started_at: Optional[float] = None
+        self.duration: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+        registry.callback(
+            "bot_ready", "1 once the startup warm-up has finished.", lambda: float(self.ready)
+        )
+
+    @property
+    def ready(self) -> bool:
+        return self.duration is not None
+
+    def start(self) -> asyncio.Task:
+        if self.task is None:
+            self.task = asyncio.create_task(self.run())
+        return self.task
+
+    async def run(self) -> None:
+        self.started_at = time.perf_counter()
+        await asyncio.gather(
+            self._step("render_pool", lambda: asyncio.to_thread(get_render_service().start)),
+            self._step("openai", lambda: asyncio.to_thread(_warm_openai)),
+            self._step("supabase", lambda: asyncio.to_thread(_warm_supabase)),
+            self._step("telegram", self.bot.get_me),
+            self._step("caches", lambda: asyncio.to_thread(self._prime_caches)),
+        )
+        self.duration = time.perf_counter() - self.started_at
+        failed = [name for name, step in self.steps.items() if step["status"] != "ok"]
+        log.info(
+            "Warm-up finished in %.2fs: failed=%s", self.duration, ",".join(failed) or "-"
+        )
+
+    @staticmethod
+    def _prime_caches() -> None:
+        get_render_cache()
+        get_usage_tracker()
+
+    async def _step(self, name: str, warm: Callable[[], Awaitable[Any]]) -> None:
+        self.steps[name] = {"status": "running"}
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(warm(), timeout=self.step_timeout)
+            status, error = "ok", None
+        except asyncio.TimeoutError:
+            status, error = "timeout", f"no result in {self.step_timeout:g}s"
+        except Exception as e:
+            status, error = "error", f"{type(e).__name__}: {e}"
+        self.steps[name] = {
+            "status": status,
+            "duration": round(time.perf_counter() - started, 3),
+            **({"error": error} if error else {}),
+        }
+        if error:
+            log.warning("Warm-up step failed: step=%s status=%s error=%s", name, status, error)
+        else:
+            log.info("Warm-up step done: step=%s duration=%.2fs", name, self.steps[name]["duration"])
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "status": "ready" if self.ready else "warming_up",
+            "duration": round(self.duration, 3) if self.ready else None,
+            "steps": self.steps,
+        }
+
+    async def cancel(self) -> None:
+        if self.task is not None and not self.task.done():
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
@@ -0,0 +1,57 @@
+import bisect
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence
+
+# Log-spaced upper bounds (seconds): 50ms .. ~2min is the range we see for
+# OpenAI completions, everything above falls into the overflow bucket.
+DEFAULT_BOUNDS = tuple(round(0.05 * 1.35**i, 3) for i in range(27))
+
+
+class LatencyHistogram:
+    """Thread-safe bucketed latency histogram with percentile estimates."""
+
+    def __init__(self, bounds: Sequence[float] = DEFAULT_BOUNDS):
+        self.bounds: List[float] = sorted(bounds)
+        self.counts: List[int] = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        index = bisect.bisect_left(self.bounds, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += seconds
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Returns the q-th percentile (0-100), interpolated inside the bucket."""
+        with self._lock:
+            counts = list(self.counts)
+            count = self.count
+        if not count:
+            return None
+
+        rank = count * min(max(q, 0.0), 100.0) / 100.0
+        seen = 0
+        for index, bucket_count in enumerate(counts):
+            if not bucket_count or seen + bucket_count < rank:
+                seen += bucket_count
+                continue
+            low = self.bounds[index - 1] if index > 0 else 0.0
+            if index == len(self.bounds):
+                return low
+            high = self.bounds[index]
+            return low + (high - low) * (rank - seen) / bucket_count
+        return self.bounds[-1]
+
+
+_histograms: Dict[str, LatencyHistogram] = defaultdict(LatencyHistogram)
+_histograms_lock = threading.Lock()
+
+
+def get_latency_histogram(name: str) -> LatencyHistogram:
+    """Returns the process-wide histogram registered under ``name``."""
+    with _histograms_lock:
+        return _histograms[name]
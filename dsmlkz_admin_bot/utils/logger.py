@@ -1,33 +1,175 @@
+import atexit
+import copy
+import gzip
+import json
 import logging
+import multiprocessing
 import os
+import queue
+import shutil
 import sys
-from logging.handlers import RotatingFileHandler
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
+from typing import Optional
 
+# Attributes every LogRecord has; anything else came in through ``extra``.
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with the record's ``extra`` fields merged in."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and key not in payload:
+                payload[key] = value
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class _QueueHandler(QueueHandler):
+    """Merges args into the message but leaves formatting to the listener's handlers."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Lets through at most ``rate`` records per second for each message template
+    starting with one of ``prefixes``; the next record that passes carries the
+    number dropped before it as ``sampled_out``. Warnings and errors always pass.
+    """
+
+    def __init__(self, prefixes, rate: float):
+        super().__init__()
+        self.prefixes = tuple(prefixes)
+        self.rate = rate
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.prefixes:
+            return True
+        template = record.msg if isinstance(record.msg, str) else ""
+        if not template.startswith(self.prefixes):
+            return True
+
+        now = time.monotonic()
+        with self._lock:
+            window_start, passed, dropped = self._windows.get(template, (now, 0, 0))
+            if now - window_start >= 1.0:
+                window_start, passed = now, 0
+            if passed >= self.rate:
+                self._windows[template] = (window_start, passed, dropped + 1)
+                return False
+            self._windows[template] = (window_start, passed + 1, 0)
+        if dropped:
+            record.sampled_out = dropped
+        return True
+
+
+def _gzip_namer(name: str) -> str:
+    return f"{name}.gz"
+
+
+def _gzip_rotator(source: str, dest: str) -> None:
+    # Removes the live log: safe only with a single writing process, see setup_logging.
+    with open(source, "rb") as src, gzip.open(dest, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(source)
+
+
+def _stop_listener() -> None:
+    """Flushes queued records; registered with ``atexit``."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def setup_logging(to_file: Optional[bool] = None):
+    """
+    Sends records through a queue to stdout and, with ``to_file``, to
+    ``logs/bot.log``. Calling it again replaces the previous handlers.
+
+    The file handler (and its gzip rotator, which removes ``bot.log`` on
+    rollover) assumes it is the file's only writer, so by default only a
+    process that is not a multiprocessing child gets it: render and sync
+    workers importing the package log to stdout.
+    """
+    global _listener
+
+    if to_file is None:
+        to_file = multiprocessing.parent_process() is None
 
-def setup_logging():
     LOG_DIR = Path(__file__).parent.parent.parent / "logs"
     LOG_DIR.mkdir(parents=True, exist_ok=True)
 
     level = os.getenv("LOG_LEVEL", "INFO").upper()
 
-    log_formatter = logging.Formatter(
-        "[%(asctime)s] %(levelname)s [%(name)s]: %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-    )
+    if os.getenv("LOG_FORMAT", "text").lower() == "json":
+        log_formatter = JsonFormatter()
+    else:
+        log_formatter = logging.Formatter(
+            "[%(asctime)s] %(levelname)s [%(name)s]: %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S",
+        )
 
-    file_handler = RotatingFileHandler(
-        LOG_DIR / "bot.log", maxBytes=5 * 1024 * 1024, backupCount=5
-    )
-    file_handler.setFormatter(log_formatter)
+    handlers = []
+    if to_file:
+        file_handler = RotatingFileHandler(
+            LOG_DIR / "bot.log", maxBytes=5 * 1024 * 1024, backupCount=5
+        )
+        file_handler.setFormatter(log_formatter)
+        # Rolled over files are gzipped on the listener thread.
+        file_handler.namer = _gzip_namer
+        file_handler.rotator = _gzip_rotator
+        handlers.append(file_handler)
 
     stdout_handler = logging.StreamHandler(sys.stdout)
     stdout_handler.setFormatter(log_formatter)
+    handlers.append(stdout_handler)
 
-    # force=True makes sure Uvicorn/Aiogram reuse our handlers/level.
-    logging.basicConfig(
-        level=level, handlers=[file_handler, stdout_handler], force=True
+    # Callers only enqueue records; formatting and file I/O (including
+    # rollover) happen on the listener's background thread.
+    if _listener is None:
+        atexit.register(_stop_listener)
+    else:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+    log_queue = queue.SimpleQueue()
+    queue_handler = _QueueHandler(log_queue)
+    sampled = [
+        prefix.strip()
+        for prefix in os.getenv(
+            "LOG_SAMPLED_MESSAGES", "Webhook received,Processed update"
+        ).split(",")
+        if prefix.strip()
+    ]
+    queue_handler.addFilter(
+        SamplingFilter(sampled, rate=float(os.getenv("LOG_SAMPLE_RATE", "1")))
     )
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+    # force=True makes sure Uvicorn/Aiogram reuse our handlers/level.
+    logging.basicConfig(level=level, handlers=[queue_handler], force=True)
 
     # Align common libraries with our log level for consistent output.
     for noisy_logger in ("uvicorn", "uvicorn.error", "uvicorn.access", "aiogram"):
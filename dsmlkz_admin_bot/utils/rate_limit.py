@@ -0,0 +1,48 @@
+"""Token bucket rate limiting for asyncio code."""
+
+import asyncio
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    ``rate`` tokens per second with bursts of up to ``capacity``.
+
+    Tokens are reserved up front (the balance may go negative), so concurrent
+    callers are spaced out in arrival order without holding a lock while they
+    sleep.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def delay(self, tokens: float = 1.0) -> float:
+        """Seconds until ``tokens`` would be available, without taking them."""
+        self._refill()
+        return max(tokens - self.tokens, 0.0) / self.rate
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """Takes ``tokens`` now and returns how long the caller has to wait for them."""
+        self._refill()
+        self.tokens -= tokens
+        return max(-self.tokens, 0.0) / self.rate
+
+    def pause(self, seconds: float) -> None:
+        """Holds the next token back for at least ``seconds``, e.g. after flood control."""
+        self._refill()
+        self.tokens = min(self.tokens, 1.0 - seconds * self.rate)
+
+    async def acquire(self, tokens: float = 1.0) -> float:
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
@@ -0,0 +1,71 @@
+"""Single-flight execution of keyed actions, with completed results memoized."""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from dsmlkz_admin_bot.utils.metrics import registry
+
+log = logging.getLogger(__name__)
+
+DEDUPLICATED = registry.counter(
+    "bot_single_flight_deduplicated_total",
+    "Calls served by an in-flight or finished action instead of running it again.",
+    labels=("flight", "state"),
+)
+
+
+class SingleFlight:
+    """
+    Runs an action at most once per key. A second call while the first is
+    running awaits the same result, and a call after it finished returns the
+    memoized result. A failed or cancelled action is forgotten, so it can be
+    retried.
+
+    The action runs inline in the first caller's task, so work it starts (e.g.
+    a ``DrainService.job``) belongs to the update that started it. Cancelling
+    that caller cancels the action; callers waiting for it are not cancelled
+    with it, the first of them runs the action again in its own task.
+    Cancelling a waiting caller doesn't affect the action.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._results: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, action: Callable[[], Awaitable[Any]]) -> Any:
+        while True:
+            future = self._results.get(key)
+            if future is None:
+                break
+            state = "done" if future.done() else "in_flight"
+            DEDUPLICATED.inc(flight=self.name, state=state)
+            log.info("Deduplicated call: flight=%s key=%s state=%s", self.name, key, state)
+            try:
+                # shielded: a cancelled follower must not cancel the shared result
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled() or asyncio.current_task().cancelling():
+                    raise
+                # the caller running it was cancelled, not this one: take over
+                log.info("Taking over cancelled call: flight=%s key=%s", self.name, key)
+
+        future = self._results[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await action()
+        except asyncio.CancelledError:
+            self._results.pop(key, None)
+            future.cancel()
+            raise
+        except Exception as e:
+            self._results.pop(key, None)
+            future.set_exception(e)
+            # followers re-raise it; without any, don't warn about an unretrieved exception
+            future.exception()
+            raise
+        future.set_result(result)
+        return result
+
+    def forget(self, key: Hashable) -> None:
+        """Allows ``key`` to run again once its current run (if any) finishes."""
+        self._results.pop(key, None)
@@ -0,0 +1,92 @@
+"""Deterministic clean-up of raw JD texts before they are sent to OpenAI."""
+
+import math
+import re
+
+EMOJI_RE = re.compile(
+    "["
+    "\U0001F000-\U0001FAFF"  # pictographs, emoticons, transport, flags, ...
+    "\u2600-\u27BF"  # misc symbols and dingbats
+    "\u2B00-\u2BFF"  # arrows, stars
+    "\u2190-\u21FF"  # arrows
+    "\u25A0-\u25FF"  # geometric shapes, square bullets
+    "\uFE0E\uFE0F\u200D\u20E3"  # variation selectors, ZWJ, keycap
+    "]+"
+)
+HASHTAG_RE = re.compile(r"(?<![\w/])#\w+")
+# Lines made only of punctuation/decoration, e.g. "-----", "•••", "*  *  *".
+DECORATION_LINE_RE = re.compile(r"^[\W_]+$")
+# One marker and a space, so "**bold**", "-5%" or ">=3 years" stay as they are.
+BULLET_PREFIX_RE = re.compile("^[-\u2013\u2014\u2022\u00B7*>]\\s+(?=\\S)")
+SPACES_RE = re.compile("[ \t\u00A0\u2000-\u200B\u3000]+")
+BOILERPLATE_RE = re.compile(
+    r"^("
+    r"sent from my .*"
+    r"|отправлено с .*"
+    r"|подпис(ыва|ы)йтесь.*"
+    r"|subscribe to .*"
+    r"|follow us.*"
+    r"|(best|kind) regards,?"
+    r"|с уважением,?"
+    r"|#?(реклама|ad|advertisement)"
+    r")$",
+    re.IGNORECASE,
+)
+TOKEN_PIECE_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough local estimate of BPE tokens, good enough to compare a text with
+    its compacted version: ~4 chars per token for ASCII words, ~2 otherwise.
+    """
+    tokens = 0
+    for piece in TOKEN_PIECE_RE.findall(text or ""):
+        chars_per_token = 4 if piece.isascii() else 2
+        tokens += math.ceil(len(piece) / chars_per_token)
+    return tokens
+
+
+def _clean_line(line: str, seen_hashtags: set) -> str:
+    line = EMOJI_RE.sub(" ", line)
+
+    def drop_repeated_hashtag(match: re.Match) -> str:
+        tag = match.group(0).lower()
+        if tag in seen_hashtags:
+            return ""
+        seen_hashtags.add(tag)
+        return match.group(0)
+
+    line = HASHTAG_RE.sub(drop_repeated_hashtag, line)
+    line = BULLET_PREFIX_RE.sub("- ", line)
+    return SPACES_RE.sub(" ", line).strip()
+
+
+def compact_jd(text: str, max_chars: int = 6000) -> str:
+    """
+    Strips emojis, decoration and boilerplate lines, removes repeated
+    hashtags and duplicate lines, collapses whitespace and caps the result
+    at ``max_chars`` on a line boundary.
+    """
+    seen_hashtags: set = set()
+    seen_lines: set = set()
+    lines = []
+    for raw_line in (text or "").splitlines():
+        line = _clean_line(raw_line, seen_hashtags)
+        if not line or DECORATION_LINE_RE.match(line):
+            if lines and lines[-1]:
+                lines.append("")
+            continue
+        if BOILERPLATE_RE.match(line):
+            continue
+        key = line.lower()
+        if key in seen_lines:
+            continue
+        seen_lines.add(key)
+        lines.append(line)
+
+    compacted = "\n".join(lines).strip()
+    if len(compacted) > max_chars:
+        cut = compacted.rfind("\n", 0, max_chars)
+        compacted = compacted[: cut if cut > 0 else max_chars].rstrip()
+    return compacted
@@ -0,0 +1,220 @@
+"""Per-update tracing: timed spans, structured log records and a ring buffer."""
+
+import functools
+import inspect
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+from configs.config import TRACE_BUFFER_SIZE
+from dsmlkz_admin_bot.utils.metrics import registry
+
+log = logging.getLogger(__name__)
+
+SPAN_SECONDS = registry.histogram(
+    "bot_span_duration_seconds", "Duration of pipeline stages.", labels=("span", "status")
+)
+UPDATES = registry.counter("bot_updates_total", "Webhook updates handled.", labels=("kind", "status"))
+UPDATE_SECONDS = registry.histogram(
+    "bot_update_duration_seconds", "Time to handle a webhook update.", labels=("kind",)
+)
+
+
+@dataclass
+class Span:
+    name: str
+    span_id: int
+    parent_id: Optional[int]
+    # seconds since the start of the trace
+    start: float
+    duration: Optional[float] = None
+    status: str = "ok"
+    attrs: Dict[str, Any] = field(default_factory=dict)
+
+
+class Trace:
+    """Spans recorded while handling one update, keyed by its ``update_id``."""
+
+    def __init__(self, trace_id: Any, kind: str, attrs: Dict[str, Any]):
+        self.trace_id = str(trace_id)
+        self.kind = kind
+        self.attrs = attrs
+        self.started_at = time.time()
+        self.duration: Optional[float] = None
+        self.status = "ok"
+        self.spans: List[Span] = []
+        self._started = time.perf_counter()
+        self._ids = itertools.count(1)
+
+    @property
+    def finished(self) -> bool:
+        return self.duration is not None
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._started
+
+    def open_span(self, name: str, parent_id: Optional[int], attrs: Dict[str, Any]) -> Span:
+        span = Span(name, next(self._ids), parent_id, self.elapsed(), attrs=attrs)
+        self.spans.append(span)
+        return span
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "kind": self.kind,
+            "started_at": self.started_at,
+            "duration": self.duration,
+            "status": self.status,
+            "attrs": self.attrs,
+            "spans": [asdict(span) for span in self.spans],
+        }
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Optional[int]] = ContextVar("current_span", default=None)
+_traces: Deque[Dict[str, Any]] = deque(maxlen=TRACE_BUFFER_SIZE)
+_traces_lock = threading.Lock()
+
+
+def current_trace_id() -> Optional[str]:
+    trace = _current_trace.get()
+    return trace.trace_id if trace else None
+
+
+def _emit_span(trace: Trace, span: Span) -> None:
+    log.debug(
+        "Span finished: trace=%s span=%s duration=%.1fms status=%s",
+        trace.trace_id,
+        span.name,
+        span.duration * 1000,
+        span.status,
+        extra={
+            "trace_id": trace.trace_id,
+            "span": span.name,
+            "duration_ms": round(span.duration * 1000, 3),
+            "status": span.status,
+            "attrs": span.attrs,
+        },
+    )
+
+
+@contextmanager
+def start_trace(trace_id: Any, kind: str, **attrs) -> Iterator[Trace]:
+    """Makes spans opened in this context (and tasks/threads it starts) part of one trace."""
+    trace = Trace(trace_id, kind, attrs)
+    trace_token = _current_trace.set(trace)
+    span_token = _current_span.set(None)
+    try:
+        yield trace
+    except BaseException as e:
+        trace.status = "error"
+        trace.attrs["error"] = type(e).__name__
+        raise
+    finally:
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+        trace.duration = trace.elapsed()
+        UPDATES.inc(kind=kind, status=trace.status)
+        UPDATE_SECONDS.observe(trace.duration, kind=kind)
+        record = trace.to_dict()
+        with _traces_lock:
+            _traces.append(record)
+        log.info(
+            "Trace finished: trace=%s kind=%s duration=%.1fms spans=%s status=%s",
+            trace.trace_id,
+            kind,
+            trace.duration * 1000,
+            len(trace.spans),
+            trace.status,
+            extra={"trace_id": trace.trace_id, "trace": record},
+        )
+
+
+@contextmanager
+def span(name: str, **attrs) -> Iterator[Optional[Span]]:
+    """
+    Times a pipeline stage into the span histogram and, inside a trace, records
+    it as a span of that trace.
+    """
+    trace = _current_trace.get()
+    if trace is not None and trace.finished:
+        trace = None
+    record = token = None
+    if trace is not None:
+        record = trace.open_span(name, _current_span.get(), attrs)
+        token = _current_span.set(record.span_id)
+    status = "ok"
+    started = time.perf_counter()
+    try:
+        yield record
+    except BaseException as e:
+        status = "error"
+        if record is not None:
+            record.status = status
+            record.attrs["error"] = type(e).__name__
+        raise
+    finally:
+        duration = time.perf_counter() - started
+        SPAN_SECONDS.observe(duration, span=name, status=status)
+        if record is not None:
+            _current_span.reset(token)
+            record.duration = duration
+            _emit_span(trace, record)
+
+
+def record_span(name: str, duration: float, **attrs) -> None:
+    """Adds a stage timed elsewhere (e.g. in a worker process) that ended just now."""
+    SPAN_SECONDS.observe(duration, span=name, status="ok")
+    trace = _current_trace.get()
+    if trace is None or trace.finished:
+        return
+    record = trace.open_span(name, _current_span.get(), attrs)
+    record.start = max(record.start - duration, 0.0)
+    record.duration = duration
+    _emit_span(trace, record)
+
+
+def traced(name: Optional[str] = None):
+    """Decorator wrapping a sync or async function in ``span``."""
+
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def recent_traces(limit: int = 10) -> List[Dict[str, Any]]:
+    """Finished traces, newest first."""
+    with _traces_lock:
+        return list(itertools.islice(reversed(_traces), limit))
+
+
+def find_trace(trace_id: Any) -> Optional[Dict[str, Any]]:
+    trace_id = str(trace_id)
+    with _traces_lock:
+        for record in reversed(_traces):
+            if record["trace_id"] == trace_id:
+                return record
+    return None
@@ -0,0 +1,191 @@
+"""
+Checks that JobDrawer with the YAML card templates renders pixel-identical
+cards to the reference drawer: the original hard-coded IT/ML layout and its
+layout algorithm (font shrinking 5pt at a time, every row prefix re-measured).
+
+    python -m scripts.check_card_layout [--corpus assets/regression/cards.jsonl]
+"""
+
+import argparse
+import json
+import sys
+import time
+from collections import defaultdict
+from typing import List
+
+from PIL import ImageDraw
+
+from dsmlkz_admin_bot.services.asset_cache import asset_cache
+from dsmlkz_admin_bot.services.hr_assistant_service import ChatGptHrAssistant
+from dsmlkz_admin_bot.services.jd_drawing_service import get_job_drawer
+
+REFERENCE_TEMPLATES = {
+    "it": "assets/images/it_jobs_background_new.png",
+    "ml": "assets/images/ml_jobs_background_new.png",
+}
+TITLE_FONT_PATH = "assets/fonts/PressStart2P-Regular.ttf"
+DESCRIPTION_FONT_PATH = "assets/fonts/NotoSans-Regular.ttf"
+
+
+class ReferenceJobDrawer:
+    """The original hard-coded drawer with the quadratic layout, kept as the ground truth."""
+
+    def __init__(self, img_path, font_path: str, description_font_path):
+        self.img = asset_cache.get_image(img_path)
+        self.font_path = font_path
+        self.description_font_path = description_font_path
+        self.img_size = self.img.size[0]
+        self.left_margin_size = 25
+        self.yellow_color = (255, 243, 42)
+        self.blue_color = (0, 181, 201)
+        self.white_color = (255, 255, 255)
+
+    def draw(self, meta_info):
+        # The original field selection, independent of get_drawn_fields on purpose.
+        self._adaptive_draw(
+            meta_info["position_name"],
+            top_margin=300,
+            max_rows=2,
+            color=self.yellow_color,
+        )
+        self._adaptive_draw(
+            meta_info["company_name"],
+            top_margin=450,
+            default_size=50,
+            max_rows=1,
+            color=self.blue_color,
+        )
+
+        salary_repr = ChatGptHrAssistant.get_money_repr(meta_info)
+        location_repr = ChatGptHrAssistant.get_location_repr(meta_info)
+        location_repr = location_repr.replace("\\/", "")
+        self._adaptive_draw(
+            salary_repr,
+            top_margin=550,
+            default_size=45,
+            max_rows=1,
+            color=self.yellow_color,
+        )
+        self._adaptive_draw(
+            location_repr,
+            top_margin=650,
+            default_size=35,
+            max_rows=1,
+            color=self.white_color,
+            left_alignement=False,
+        )
+
+        description = meta_info.get("description", None)
+        if description:
+            details = description.get("project_details", None) or description.get(
+                "company_details", None
+            )
+            if details:
+                self._adaptive_draw(
+                    details,
+                    top_margin=800,
+                    default_size=35,
+                    max_rows=4,
+                    color=self.blue_color,
+                    use_default_font=False,
+                )
+        return self.img
+
+    def _adaptive_draw(
+        self,
+        text,
+        top_margin,
+        color,
+        default_size=70,
+        max_rows: int = 1,
+        use_default_font=True,
+        left_alignement: bool = True,
+    ):
+        font_size = default_size
+        draw = ImageDraw.Draw(self.img)
+
+        while True:
+            rows = self._split_by_rows(text, font_size, use_default_font)
+            if len(rows) > max_rows:
+                font_size -= 5
+            else:
+                font_path = (
+                    self.font_path if use_default_font else self.description_font_path
+                )
+                font = asset_cache.get_font(font_path, font_size)
+                current_text_y = top_margin
+                for row in rows:
+                    if left_alignement:
+                        text_position = (self.left_margin_size, current_text_y)
+                    else:
+                        text_width = draw.textlength(row, font=font)
+                        text_position = (
+                            self.img_size - self.left_margin_size - text_width,
+                            current_text_y,
+                        )
+
+                    draw.text(text_position, row, fill=color, font=font)
+                    _, _, _, current_text_y = draw.textbbox(
+                        text_position, row, font=font
+                    )
+                return font_size
+
+    def _split_by_rows(self, text, font_size: int, use_default_font=True) -> List[str]:
+        font_path = self.font_path if use_default_font else self.description_font_path
+        font = asset_cache.get_font(font_path, font_size)
+        draw = ImageDraw.Draw(self.img)
+        max_caption_size = self.img_size - 2 * self.left_margin_size
+        text_width = draw.textlength(text, font=font)
+        if text_width < max_caption_size:
+            return [text]
+        words = text.split()
+        rows = defaultdict(str)
+        current_row = 0
+        for word in words:
+            possible_row = (rows[current_row] + " " + word).strip()
+            possible_row_size = draw.textlength(possible_row, font=font)
+            if possible_row_size < max_caption_size:
+                rows[current_row] = possible_row
+            else:
+                current_row += 1
+                rows[current_row] = word
+        return [rows[row_id] for row_id in range(len(rows))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JobDrawer layout regression check")
+    parser.add_argument("--corpus", default="assets/regression/cards.jsonl")
+    args = parser.parse_args()
+
+    with open(args.corpus, encoding="utf-8") as f:
+        cards = [json.loads(line) for line in f if line.strip()]
+
+    mismatches = 0
+    reference_time = current_time = 0.0
+    for job_type, img_path in REFERENCE_TEMPLATES.items():
+        for index, meta_info in enumerate(cards, start=1):
+            reference = ReferenceJobDrawer(
+                img_path, TITLE_FONT_PATH, DESCRIPTION_FONT_PATH
+            )
+            started = time.perf_counter()
+            expected = reference.draw(meta_info).tobytes()
+            reference_time += time.perf_counter() - started
+
+            started = time.perf_counter()
+            actual = get_job_drawer(job_type).draw(meta_info).tobytes()
+            current_time += time.perf_counter() - started
+
+            if actual != expected:
+                mismatches += 1
+                print(f"❌ {job_type} card #{index} differs: {meta_info.get('position_name')}")
+
+    total = len(cards) * len(REFERENCE_TEMPLATES)
+    print(
+        f"{total - mismatches}/{total} cards identical; "
+        f"reference {reference_time:.2f}s, current {current_time:.2f}s"
+    )
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
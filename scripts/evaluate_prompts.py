@@ -0,0 +1,321 @@
+"""
+Offline evaluation of jd2dict prompt/model variants.
+
+Runs a corpus of JDs through ChatGptHrAssistant for every variant and reports
+schema-validity rate, retries, output size, tokens and wall time.
+
+Examples:
+    # record completions once against OpenAI (or a local stub server)
+    python -m scripts.evaluate_prompts --corpus jds.md \\
+        --variant current=configs.prompts:jd2dict_prompt \\
+        --variant legacy=configs.prompts:jd2dict_prompt_legacy@gpt-4o \\
+        --base-url http://localhost:8080/v1 --record recordings.jsonl
+
+    # replay them offline, as often as needed
+    python -m scripts.evaluate_prompts --corpus jds.md \\
+        --variant current=configs.prompts:jd2dict_prompt \\
+        --replay recordings.jsonl
+"""
+
+import argparse
+import hashlib
+import importlib
+import json
+import logging
+import os
+import statistics
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+from configs.config import HR_ASSISTANT_MODEL
+from dsmlkz_admin_bot.communication.bulk_jd_handler import split_jds
+from dsmlkz_admin_bot.services.hr_assistant_service import ChatGptHrAssistant
+
+SCHEMA_KEYS = {
+    "company_name",
+    "position_name",
+    "location",
+    "salary_range",
+    "contacts",
+    "description",
+    "requirements",
+}
+
+
+@dataclass
+class Variant:
+    name: str
+    prompt: str
+    model: str
+
+
+@dataclass
+class JdResult:
+    ok: bool
+    calls: int
+    schema_valid: int
+    output_chars: int
+    prompt_tokens: int
+    completion_tokens: int
+    wall_time: float
+    error: Optional[str] = None
+
+
+@dataclass
+class VariantReport:
+    variant: Variant
+    results: List[JdResult] = field(default_factory=list)
+
+    def summary(self) -> Dict:
+        results = self.results
+        calls = sum(r.calls for r in results)
+        wall_times = sorted(r.wall_time for r in results)
+        return {
+            "variant": self.variant.name,
+            "model": self.variant.model,
+            "jds": len(results),
+            "success_rate": sum(r.ok for r in results) / len(results),
+            "schema_valid_rate": sum(r.schema_valid for r in results) / max(calls, 1),
+            "retries": calls - len(results),
+            "avg_output_chars": statistics.mean(r.output_chars for r in results),
+            "prompt_tokens": sum(r.prompt_tokens for r in results),
+            "completion_tokens": sum(r.completion_tokens for r in results),
+            "wall_time_p50": wall_times[len(wall_times) // 2],
+            "wall_time_p95": wall_times[min(int(len(wall_times) * 0.95), len(wall_times) - 1)],
+            "wall_time_total": sum(wall_times),
+        }
+
+
+def completion_key(model: str, messages: List[Dict]) -> str:
+    payload = json.dumps([model, messages], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def is_schema_valid(content: str) -> bool:
+    try:
+        parsed = json.loads(content)
+    except json.JSONDecodeError:
+        return False
+    return isinstance(parsed, dict) and set(parsed) == SCHEMA_KEYS
+
+
+class RecordingCompletions:
+    """Wraps real completions and appends each response to a JSONL file."""
+
+    def __init__(self, completions, path: Path):
+        self.completions = completions
+        self.path = path
+        self.lock = threading.Lock()
+
+    def create(self, model, messages, **kwargs):
+        started = time.perf_counter()
+        completion = self.completions.create(model=model, messages=messages, **kwargs)
+        record = {
+            "key": completion_key(model, messages),
+            "model": model,
+            "content": completion.choices[0].message.content,
+            "prompt_tokens": getattr(completion.usage, "prompt_tokens", 0),
+            "completion_tokens": getattr(completion.usage, "completion_tokens", 0),
+            "latency": time.perf_counter() - started,
+        }
+        with self.lock, self.path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        return completion
+
+
+class ReplayCompletions:
+    """
+    Serves recorded completions, optionally sleeping for the recorded latency.
+    Repeated requests get the recorded responses in order, so retries replay too.
+    """
+
+    def __init__(self, path: Path, simulate_latency: bool = False):
+        self.records = defaultdict(list)
+        with path.open(encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    self.records[record["key"]].append(record)
+        self.simulate_latency = simulate_latency
+        self.cursors = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def create(self, model, messages, **kwargs):
+        key = completion_key(model, messages)
+        if key not in self.records:
+            raise KeyError(f"No recorded completion for model={model}")
+        with self.lock:
+            records = self.records[key]
+            record = records[min(self.cursors[key], len(records) - 1)]
+            self.cursors[key] += 1
+        if self.simulate_latency:
+            time.sleep(record["latency"])
+        return SimpleNamespace(
+            id=f"replay-{record['key'][:12]}",
+            choices=[SimpleNamespace(message=SimpleNamespace(content=record["content"]))],
+            usage=SimpleNamespace(
+                prompt_tokens=record["prompt_tokens"],
+                completion_tokens=record["completion_tokens"],
+            ),
+        )
+
+
+class MeasuringCompletions:
+    """Per-JD wrapper counting calls, tokens and schema-valid raw responses."""
+
+    def __init__(self, completions):
+        self.completions = completions
+        self.calls = 0
+        self.schema_valid = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def create(self, **kwargs):
+        self.calls += 1
+        completion = self.completions.create(**kwargs)
+        self.schema_valid += is_schema_valid(completion.choices[0].message.content or "")
+        self.prompt_tokens += getattr(completion.usage, "prompt_tokens", 0) or 0
+        self.completion_tokens += getattr(completion.usage, "completion_tokens", 0) or 0
+        return completion
+
+
+def load_variant(spec: str) -> Variant:
+    """Parses ``name=module:attr[@model]`` or ``name=path/to/prompt.txt[@model]``."""
+    name, _, source = spec.partition("=")
+    source, _, model = source.partition("@")
+    if Path(source).is_file():
+        prompt = Path(source).read_text(encoding="utf-8")
+    else:
+        module_name, _, attr = source.partition(":")
+        prompt = getattr(importlib.import_module(module_name), attr)
+    return Variant(name=name, prompt=prompt, model=model or HR_ASSISTANT_MODEL)
+
+
+def evaluate_jd(variant: Variant, jd: str, completions) -> JdResult:
+    assistant = ChatGptHrAssistant(
+        api_key=os.getenv("OPENAI_API_KEY", "offline"),
+        model=variant.model,
+        system_prompt=variant.prompt,
+        hedge_percentile=0,
+        retry_wait=0,
+        track_usage=False,
+    )
+    measuring = MeasuringCompletions(completions)
+    assistant.client = SimpleNamespace(chat=SimpleNamespace(completions=measuring))
+
+    started = time.perf_counter()
+    error = None
+    output = {}
+    try:
+        output = assistant.text2dict(jd)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return JdResult(
+        ok=error is None,
+        calls=measuring.calls,
+        schema_valid=measuring.schema_valid,
+        output_chars=len(json.dumps(output, ensure_ascii=False)) if output else 0,
+        prompt_tokens=measuring.prompt_tokens,
+        completion_tokens=measuring.completion_tokens,
+        wall_time=time.perf_counter() - started,
+        error=error,
+    )
+
+
+def evaluate_variant(variant: Variant, jds: List[str], completions, workers: int):
+    report = VariantReport(variant)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        report.results = list(pool.map(lambda jd: evaluate_jd(variant, jd, completions), jds))
+    return report
+
+
+def build_completions(args):
+    if args.replay:
+        return ReplayCompletions(Path(args.replay), simulate_latency=args.simulate_latency)
+    client = ChatGptHrAssistant(
+        api_key=os.getenv("OPENAI_API_KEY", "offline"), base_url=args.base_url
+    ).client
+    completions = client.chat.completions
+    if args.record:
+        completions = RecordingCompletions(completions, Path(args.record))
+    return completions
+
+
+def print_reports(summaries: List[Dict]):
+    columns = [
+        ("variant", "{}"),
+        ("model", "{}"),
+        ("jds", "{}"),
+        ("success_rate", "{:.0%}"),
+        ("schema_valid_rate", "{:.0%}"),
+        ("retries", "{}"),
+        ("avg_output_chars", "{:.0f}"),
+        ("prompt_tokens", "{}"),
+        ("completion_tokens", "{}"),
+        ("wall_time_p50", "{:.2f}s"),
+        ("wall_time_p95", "{:.2f}s"),
+        ("wall_time_total", "{:.1f}s"),
+    ]
+    rows = [[name for name, _ in columns]]
+    rows += [[fmt.format(summary[name]) for name, fmt in columns] for summary in summaries]
+    widths = [max(len(row[i]) for row in rows) for i in range(len(columns))]
+    for row in rows:
+        print("  ".join(cell.ljust(width) for cell, width in zip(row, widths)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--corpus", required=True, help=".txt/.md (--- separated) or .jsonl")
+    parser.add_argument(
+        "--variant",
+        action="append",
+        required=True,
+        help="name=module:attr[@model] or name=prompt.txt[@model], repeatable",
+    )
+    backend = parser.add_mutually_exclusive_group()
+    backend.add_argument("--replay", help="JSONL of recorded completions")
+    backend.add_argument("--base-url", help="OpenAI-compatible stub server URL")
+    parser.add_argument("--record", help="append live/stub completions to this JSONL")
+    parser.add_argument(
+        "--simulate-latency",
+        action="store_true",
+        help="sleep for recorded latency when replaying",
+    )
+    parser.add_argument("--workers", type=int, default=4, help="JDs in flight per variant")
+    parser.add_argument("--json", help="write summaries to this file")
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    corpus = Path(args.corpus)
+    jds = split_jds(corpus.read_text(encoding="utf-8"), corpus.suffix.lower())
+    variants = [load_variant(spec) for spec in args.variant]
+    completions = build_completions(args)
+    print(f"Evaluating {len(variants)} variant(s) on {len(jds)} JD(s)")
+
+    with ThreadPoolExecutor(max_workers=len(variants)) as pool:
+        reports = list(
+            pool.map(
+                lambda variant: evaluate_variant(variant, jds, completions, args.workers),
+                variants,
+            )
+        )
+
+    summaries = [report.summary() for report in reports]
+    print_reports(summaries)
+    for report in reports:
+        for index, result in enumerate(report.results, start=1):
+            if result.error:
+                print(f"❌ {report.variant.name} JD #{index}: {result.error}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(summaries, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,7 @@ from configs.config import BOT_TOKEN
 from configs.prev_messages import (aimoldin_jobs_messages, it_jobs_messages,
                                    news_messages)
 from dsmlkz_admin_bot.communication.message_processor import MessageProcessor
+from dsmlkz_admin_bot.services.telegram_gateway import TelegramGateway
 
 messages_to_process = {
     # "news": [(-1001055767503, post_id) for post_id in news_messages],
@@ -46,12 +47,13 @@ async def process_batch(
 
 
 async def main():
-    bot = Bot(token=BOT_TOKEN)
+    bot = TelegramGateway(token=BOT_TOKEN)
     try:
         await process_batch(
             bot, user_id=212657982, messages_by_type=messages_to_process
         )
     finally:
+        await bot.shutdown()
         session = await bot.get_session()
         await session.close()
 
@@ -0,0 +1,97 @@
+"""
+Import-time profile of the web entrypoint.
+
+Imports a module in a fresh interpreter with ``-X importtime`` (best of
+``--repeat`` runs), prints the total and the packages that took longest, and
+exits non-zero if the total is over ``--budget-ms`` or a module that should
+load lazily (OpenAI, Supabase by default) was imported.
+
+Examples:
+    python -m scripts.profile_imports
+
+    # include building the app, as `uvicorn --factory` does
+    python -m scripts.profile_imports --call create_app --budget-ms 1500
+"""
+
+import argparse
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# (name, self time, cumulative time, nesting depth); times in microseconds
+ImportRecord = Tuple[str, int, int, int]
+
+
+def parse_importtime(stderr: str) -> List[ImportRecord]:
+    records = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        if not self_us.strip().isdigit():
+            # the header line
+            continue
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        records.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return records
+
+
+def profile(module: str, call: str) -> List[ImportRecord]:
+    code = f"import {module}"
+    if call:
+        code += f"; {module}.{call}()"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        sys.stderr.write(result.stderr[-2000:])
+        raise SystemExit(f"❌ `{code}` failed with exit code {result.returncode}")
+    return parse_importtime(result.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--module", default="dsmlkz_admin_bot.run")
+    parser.add_argument("--call", default="", help="module attribute to call after import")
+    parser.add_argument("--repeat", type=int, default=3, help="runs; the fastest is reported")
+    parser.add_argument("--top", type=int, default=15, help="packages to list")
+    parser.add_argument("--budget-ms", type=float, default=1000)
+    parser.add_argument(
+        "--lazy",
+        default="openai,supabase",
+        help="comma-separated packages that must not be imported",
+    )
+    args = parser.parse_args()
+
+    runs = [profile(args.module, args.call) for _ in range(max(args.repeat, 1))]
+    records = min(runs, key=lambda run: sum(r[2] for r in run if r[3] == 0))
+    total_ms = sum(r[2] for r in records if r[3] == 0) / 1000
+
+    # self time summed per root package, so nested imports aren't counted twice
+    packages: Dict[str, int] = {}
+    for name, self_us, _, _ in records:
+        package = name.split(".")[0]
+        packages[package] = packages.get(package, 0) + self_us
+    loaded = {name for name, *_ in records}
+    eager = [
+        package
+        for package in filter(None, (p.strip() for p in args.lazy.split(",")))
+        if package in loaded
+    ]
+
+    target = f"{args.module}.{args.call}()" if args.call else args.module
+    print(f"Import profile of {target} ({len(records)} modules, best of {len(runs)})")
+    print(f"  total          {total_ms:.0f} ms (budget {args.budget_ms:.0f} ms)")
+    for name, self_us in sorted(packages.items(), key=lambda item: -item[1])[: args.top]:
+        print(f"  {self_us / 1000:8.1f} ms  {name}")
+    if eager:
+        print(f"❌ imported eagerly: {', '.join(eager)}")
+    if total_ms > args.budget_ms:
+        print(f"❌ over budget by {total_ms - args.budget_ms:.0f} ms")
+    sys.exit(1 if eager or total_ms > args.budget_ms else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Batch job card rendering and renderer benchmark.
+
+Renders a JSONL of text2dict-shaped dicts (one card per line) with JobDrawer
+across worker processes, writes the encoded cards to a directory and reports
+cards/second, p50/p95 render latency and peak RSS.
+
+Examples:
+    python -m scripts.render_cards --input assets/regression/cards.jsonl \\
+        --output-dir rendered --processes 4
+
+    # throughput baseline without keeping the images
+    python -m scripts.render_cards --input assets/regression/cards.jsonl \\
+        --repeat 20 --format png --no-write
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from configs.config import CARD_IMAGE_FORMAT, CARD_IMAGE_QUALITY
+from dsmlkz_admin_bot.services.card_templates import get_card_templates
+from dsmlkz_admin_bot.services.jd_drawing_service import (IMAGE_FORMATS,
+                                                          card_filename,
+                                                          preload_job_assets,
+                                                          render_job_card)
+
+
+def peak_rss_mb(who: int = resource.RUSAGE_SELF) -> float:
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak = resource.getrusage(who).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def render_card(
+    index: int,
+    job_type: str,
+    meta_info: Dict,
+    image_format: str,
+    quality: int,
+    output_dir: Optional[str],
+) -> Tuple[int, float, int, float]:
+    """Renders one card, returns (index, render seconds, size in bytes, worker peak RSS)."""
+    started = time.perf_counter()
+    card = render_job_card(job_type, meta_info, image_format, quality)
+    render_seconds = time.perf_counter() - started
+    if output_dir:
+        path = Path(output_dir) / card_filename(f"{index:05d}", image_format)
+        path.write_bytes(card)
+    return index, render_seconds, len(card), peak_rss_mb()
+
+
+def load_cards(path: str) -> List[Dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * q / 100), len(ordered) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--input", required=True, help="JSONL of text2dict outputs")
+    parser.add_argument("--output-dir", default="rendered_cards")
+    parser.add_argument("--no-write", action="store_true", help="render and encode only")
+    parser.add_argument("--template", help="card template name (default from the YAML)")
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="worker processes, 0 renders in this process",
+    )
+    parser.add_argument("--format", choices=IMAGE_FORMATS, default=CARD_IMAGE_FORMAT)
+    parser.add_argument("--quality", type=int, default=CARD_IMAGE_QUALITY)
+    parser.add_argument("--repeat", type=int, default=1, help="render the input N times")
+    args = parser.parse_args()
+
+    templates = get_card_templates()
+    job_type = args.template or templates.default
+    if job_type not in templates:
+        parser.error(f"unknown template {job_type!r}, available: {', '.join(t.name for t in templates)}")
+
+    cards = load_cards(args.input) * args.repeat
+    output_dir = None if args.no_write else args.output_dir
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    print(
+        f"Rendering {len(cards)} card(s): template={job_type} format={args.format} "
+        f"processes={args.processes}"
+    )
+
+    tasks = [
+        (index, job_type, meta_info, args.format, args.quality, output_dir)
+        for index, meta_info in enumerate(cards, start=1)
+    ]
+    results = []
+    failures = 0
+    if args.processes > 0:
+        # Startup (spawn + asset preload) is excluded from the throughput.
+        pool = ProcessPoolExecutor(
+            max_workers=args.processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=preload_job_assets,
+        )
+        list(pool.map(time.sleep, [0.1] * args.processes))
+        started = time.perf_counter()
+        futures = [pool.submit(render_card, *task) for task in tasks]
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                failures += 1
+                print(f"❌ {e!r}")
+        wall_time = time.perf_counter() - started
+        pool.shutdown()
+    else:
+        preload_job_assets()
+        started = time.perf_counter()
+        for task in tasks:
+            try:
+                results.append(render_card(*task))
+            except Exception as e:
+                failures += 1
+                print(f"❌ card #{task[0]}: {e!r}")
+        wall_time = time.perf_counter() - started
+
+    if not results:
+        print("No cards rendered")
+        sys.exit(1)
+
+    render_times = [result[1] for result in results]
+    sizes = [result[2] for result in results]
+    worker_rss = max(result[3] for result in results)
+    print(f"Rendered {len(results)} card(s), {failures} failed, in {wall_time:.2f}s")
+    print(f"  throughput     {len(results) / wall_time:.1f} cards/s")
+    print(
+        f"  render         p50 {percentile(render_times, 50) * 1000:.1f} ms, "
+        f"p95 {percentile(render_times, 95) * 1000:.1f} ms"
+    )
+    print(f"  avg card size  {sum(sizes) / len(sizes) / 1024:.1f} KiB")
+    print(f"  peak RSS       parent {peak_rss_mb():.1f} MiB, worker {worker_rss:.1f} MiB")
+    if output_dir:
+        print(f"  output         {output_dir}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""
+Incremental sync of community faces to Supabase.
+
+Downloads member photos from faces.json concurrently in memory, normalizes
+changed ones to fixed-size square JPEGs in a process pool, uploads them to
+the faces bucket and replaces `community_faces` rows by name in bulk. A manifest
+of ETags and content hashes makes reruns skip unchanged members.
+
+Examples:
+    python -m scripts.sync_faces --faces faces.json
+    python -m scripts.sync_faces --faces faces.json --dry-run
+    python -m scripts.sync_faces --faces faces.json --force --sizes 512,256,96
+"""
+
+import argparse
+import asyncio
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import aiohttp
+from PIL import Image, ImageOps
+from supabase import create_client
+
+from configs.config import FACES_BUCKET, SUPABASE_KEY, SUPABASE_URL, USER_ID
+
+IMAGE_FOLDER = "faces"
+FACES_TABLE = "community_faces"
+ROW_FIELDS = (
+    "title",
+    "title_ru",
+    "description",
+    "description_ru",
+    "location",
+    "linkedin",
+    "website",
+    "telegram",
+    "kaggle",
+    "display_order",
+)
+UPSERT_CHUNK_SIZE = 500
+
+
+@dataclass
+class MemberSync:
+    member: Dict
+    slug: str
+    entry: Dict
+    image_changed: bool = False
+    row_changed: bool = False
+    source: Optional[bytes] = None
+    images: Dict[int, bytes] = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+def member_slug(name: str) -> str:
+    return name.replace(" ", "_").replace("&nbsp;", "_")
+
+
+def storage_path(slug: str, size: int) -> str:
+    return f"{IMAGE_FOLDER}/{slug}_{size}.jpg"
+
+
+def build_row(member: Dict, slug: str, sizes: List[int]) -> Dict:
+    row = {name: member.get(name) for name in ROW_FIELDS}
+    row.update(
+        name=member["name"],
+        image_path=f"{FACES_BUCKET}/{storage_path(slug, max(sizes))}",
+        user_id=USER_ID,
+    )
+    return row
+
+
+def row_hash(row: Dict) -> str:
+    return hashlib.sha256(json.dumps(row, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def normalize_avatar(data: bytes, sizes: List[int], quality: int) -> Dict[int, bytes]:
+    """Center-cropped square RGB JPEGs of every size. Runs in the process pool."""
+    with Image.open(io.BytesIO(data)) as source:
+        image = ImageOps.exif_transpose(source).convert("RGB")
+    side = min(image.size)
+    image = ImageOps.fit(image, (side, side), method=Image.LANCZOS)
+    encoded = {}
+    for size in sizes:
+        buffer = io.BytesIO()
+        image.resize((size, size), Image.LANCZOS).save(
+            buffer, format="JPEG", quality=quality, optimize=True, progressive=True
+        )
+        encoded[size] = buffer.getvalue()
+    return encoded
+
+
+def load_manifest(path: str) -> Dict[str, Dict]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(path: str, manifest: Dict[str, Dict]) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+class FacesSync:
+    def __init__(self, args, manifest: Dict[str, Dict]):
+        self.args = args
+        self.sizes = sorted({int(size) for size in args.sizes.split(",")}, reverse=True)
+        self.manifest = manifest
+        self.semaphore = asyncio.Semaphore(args.concurrency)
+        self.bucket = None
+        self.table = None
+        if not args.dry_run:
+            client = create_client(SUPABASE_URL, SUPABASE_KEY)
+            self.bucket = client.storage.from_(FACES_BUCKET)
+            self.table = client.table(FACES_TABLE)
+
+    def plan(self, member: Dict) -> MemberSync:
+        slug = member_slug(member["name"])
+        previous = {} if self.args.force else self.manifest.get(member["name"], {})
+        entry = dict(previous)
+        item = MemberSync(member=member, slug=slug, entry=entry)
+        row = build_row(member, slug, self.sizes)
+        entry["row_sha256"] = row_hash(row)
+        item.row_changed = entry["row_sha256"] != previous.get("row_sha256")
+        # a new URL or new sizes mean the stored images no longer match
+        if previous.get("image_url") != member["image_url"] or previous.get("sizes") != self.sizes:
+            entry.pop("etag", None)
+            entry.pop("last_modified", None)
+            entry.pop("image_sha256", None)
+        entry["image_url"] = member["image_url"]
+        entry["sizes"] = self.sizes
+        return item
+
+    async def download(self, session: aiohttp.ClientSession, item: MemberSync) -> None:
+        headers = {}
+        if item.entry.get("etag"):
+            headers["If-None-Match"] = item.entry["etag"]
+        if item.entry.get("last_modified"):
+            headers["If-Modified-Since"] = item.entry["last_modified"]
+        async with self.semaphore:
+            async with session.get(item.member["image_url"], headers=headers) as response:
+                if response.status == 304:
+                    return
+                response.raise_for_status()
+                data = await response.read()
+                etag = response.headers.get("ETag")
+                last_modified = response.headers.get("Last-Modified")
+
+        digest = hashlib.sha256(data).hexdigest()
+        item.entry.update(etag=etag, last_modified=last_modified)
+        if digest != item.entry.get("image_sha256"):
+            item.entry["image_sha256"] = digest
+            item.image_changed = True
+            item.source = data
+
+    async def upload(self, item: MemberSync) -> None:
+        for size, data in item.images.items():
+            async with self.semaphore:
+                await asyncio.to_thread(
+                    self.bucket.upload,
+                    storage_path(item.slug, size),
+                    data,
+                    {"content-type": "image/jpeg", "x-upsert": "true"},
+                )
+
+    async def sync_member(
+        self, session: aiohttp.ClientSession, pool: ProcessPoolExecutor, item: MemberSync
+    ) -> None:
+        try:
+            await self.download(session, item)
+            if item.image_changed:
+                item.images = await asyncio.get_running_loop().run_in_executor(
+                    pool, normalize_avatar, item.source, self.sizes, self.args.quality
+                )
+                item.source = None
+                if not self.args.dry_run:
+                    await self.upload(item)
+        except Exception as e:
+            item.error = f"{type(e).__name__}: {e}"
+
+    def upsert_rows(self, items: List[MemberSync]) -> None:
+        """
+        Replaces rows by ``name``, two requests per chunk. ``community_faces``
+        has no unique constraint on it (old uploads inserted duplicates), so an
+        ``on_conflict`` upsert isn't possible: the chunk's names are deleted,
+        duplicates included, and the chunk is inserted. A chunk failing in
+        between is retried by the next run, its members aren't in the manifest.
+        """
+        rows = [build_row(item.member, item.slug, self.sizes) for item in items]
+        for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+            chunk = rows[start : start + UPSERT_CHUNK_SIZE]
+            self.table.delete().in_("name", [row["name"] for row in chunk]).execute()
+            self.table.insert(chunk).execute()
+
+    async def run(self, members: List[Dict]) -> List[MemberSync]:
+        items = [self.plan(member) for member in members]
+        pool = ProcessPoolExecutor(
+            max_workers=self.args.processes,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        timeout = aiohttp.ClientTimeout(total=self.args.timeout)
+        try:
+            async with aiohttp.ClientSession(timeout=timeout) as session:
+                await asyncio.gather(*(self.sync_member(session, pool, item) for item in items))
+        finally:
+            pool.shutdown()
+
+        changed = [
+            item for item in items if not item.error and (item.image_changed or item.row_changed)
+        ]
+        if changed and not self.args.dry_run:
+            try:
+                await asyncio.to_thread(self.upsert_rows, changed)
+            except Exception as e:
+                for item in changed:
+                    item.error = f"upsert failed: {e!r}"
+        for item in items:
+            if not item.error:
+                self.manifest[item.member["name"]] = item.entry
+        return items
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--faces", default="faces.json", help="JSON with communityMembers")
+    parser.add_argument("--manifest", default="state/faces_manifest.json")
+    parser.add_argument("--sizes", default="512,128", help="square avatar sizes, px")
+    parser.add_argument("--quality", type=int, default=85, help="JPEG quality")
+    parser.add_argument("--concurrency", type=int, default=16, help="downloads/uploads in flight")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--timeout", type=float, default=30, help="per-download timeout, s")
+    parser.add_argument("--force", action="store_true", help="ignore the manifest")
+    parser.add_argument("--dry-run", action="store_true", help="download and normalize only")
+    args = parser.parse_args()
+
+    with open(args.faces, encoding="utf-8") as f:
+        members = [m for m in json.load(f)["communityMembers"] if m.get("image_url")]
+
+    started = time.perf_counter()
+    manifest = load_manifest(args.manifest)
+    items = asyncio.run(FacesSync(args, manifest).run(members))
+    if not args.dry_run:
+        save_manifest(args.manifest, manifest)
+
+    for item in items:
+        if item.error:
+            print(f"❌ {item.member['name']}: {item.error}")
+        elif item.image_changed or item.row_changed:
+            print(
+                f"✅ {item.member['name']}: image={'updated' if item.image_changed else 'same'} "
+                f"row={'updated' if item.row_changed else 'same'}"
+            )
+    images = sum(item.image_changed for item in items if not item.error)
+    rows = sum(item.image_changed or item.row_changed for item in items if not item.error)
+    failed = sum(bool(item.error) for item in items)
+    print(
+        f"Synced {len(items)} member(s) in {time.perf_counter() - started:.1f}s: "
+        f"{images} image(s) uploaded, {rows} row(s) upserted, "
+        f"{len(items) - failed - rows} unchanged, {failed} failed"
+        + (" (dry run)" if args.dry_run else "")
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import asyncio
+import json
+
+from dsmlkz_admin_bot.services.drain_service import DrainService
+
+
+def read_journal(drain: DrainService):
+    if not drain.path.exists():
+        return []
+    return [json.loads(line) for line in drain.path.read_text().splitlines()]
+
+
+def test_waiting_deferred_job_is_journaled_right_away(tmp_path):
+    async def scenario():
+        drain = DrainService(path=str(tmp_path / "jobs.jsonl"), timeout=5)
+        waiting = asyncio.Event()
+        task = asyncio.create_task(waiting.wait())
+        drain.defer(task, "bulk_jd", jds=["a"])
+        await asyncio.sleep(0)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await drain.drain()
+        return drain, task, loop.time() - started
+
+    drain, task, elapsed = asyncio.run(scenario())
+    assert task.cancelled()
+    assert elapsed < 1
+    assert [record["kind"] for record in read_journal(drain)] == ["bulk_jd"]
+
+
+def test_running_deferred_job_gets_the_drain_deadline(tmp_path):
+    async def scenario():
+        drain = DrainService(path=str(tmp_path / "jobs.jsonl"), timeout=5)
+        started = asyncio.Event()
+        finished = []
+
+        async def run():
+            with drain.job("bulk_jd", jds=["a"]):
+                started.set()
+                await asyncio.sleep(0.2)
+                finished.append(True)
+
+        task = drain.defer(asyncio.create_task(run()), "bulk_jd", jds=["a"])
+        await started.wait()
+        await drain.drain()
+        return drain, task, finished
+
+    drain, task, finished = asyncio.run(scenario())
+    assert finished == [True]
+    assert not task.cancelled()
+    assert read_journal(drain) == []
+
+
+def test_running_deferred_job_cut_off_at_the_deadline_is_journaled(tmp_path):
+    async def scenario():
+        drain = DrainService(path=str(tmp_path / "jobs.jsonl"), timeout=0.2)
+        started = asyncio.Event()
+
+        async def run():
+            with drain.job("bulk_jd", jds=["a", "b"]) as payload:
+                payload["jds"][0] = None
+                started.set()
+                await asyncio.sleep(10)
+
+        task = drain.defer(asyncio.create_task(run()), "bulk_jd", jds=["a", "b"])
+        await started.wait()
+        await drain.drain()
+        return drain, task
+
+    drain, task = asyncio.run(scenario())
+    assert task.cancelled()
+    records = read_journal(drain)
+    assert len(records) == 1
+    assert records[0]["payload"]["jds"] == [None, "b"]
@@ -0,0 +1,140 @@
+import asyncio
+
+import pytest
+from aiogram import types
+
+from dsmlkz_admin_bot.communication.router import ANY, UpdateRouter
+
+USER_ID = 5
+STATE = "awaiting_jd"
+FORWARDED_FROM = {"forward_from_chat": {"id": -100, "type": "channel"}}
+PHOTO = {"photo": [{"file_id": "x", "file_unique_id": "y", "width": 1, "height": 1}]}
+
+
+def make_message(**fields) -> types.Message:
+    data = {
+        "message_id": 1,
+        "date": 0,
+        "chat": {"id": USER_ID, "type": "private"},
+        "from": {"id": USER_ID, "is_bot": False, "first_name": "a"},
+    }
+    data.update(fields)
+    return types.Message.to_object(data)
+
+
+def make_command(text: str) -> types.Message:
+    length = len(text.split()[0])
+    return make_message(text=text, entities=[{"type": "bot_command", "offset": 0, "length": length}])
+
+
+def make_callback(data: str) -> types.CallbackQuery:
+    return types.CallbackQuery.to_object(
+        {
+            "id": "1",
+            "from": {"id": USER_ID, "is_bot": False, "first_name": "a"},
+            "chat_instance": "x",
+            "data": data,
+        }
+    )
+
+
+def handler(name: str):
+    async def handle(update):
+        pass
+
+    handle.__name__ = name
+    return handle
+
+
+def routed(handler_or_none):
+    return handler_or_none.__name__ if handler_or_none else None
+
+
+@pytest.fixture
+def states():
+    return {}
+
+
+@pytest.fixture
+def router(states):
+    router = UpdateRouter(get_state=states.get)
+    router.command("new_jd", handler("new_jd"))
+    router.command("cancel", handler("cancel_in_state"), state=STATE)
+    router.command("cancel", handler("cancel"))
+    router.message(handler("jd_text"), types.ContentType.TEXT, state=STATE)
+    router.message(handler("any_in_state"), state=STATE)
+    router.message(handler("forwarded_text"), types.ContentType.TEXT, forwarded=True)
+    router.message(handler("forwarded_any"), forwarded=True)
+    router.message(handler("text"), types.ContentType.TEXT)
+    router.callback("job_type", handler("job_type"), state=STATE)
+    router.callback("parse_job", handler("parse_job"))
+    return router
+
+
+def test_command_wins_over_stateful_and_stateless_messages(router, states):
+    states[USER_ID] = STATE
+    assert routed(router.route_message(make_command("/new_jd@bot"))) == "new_jd"
+    states.clear()
+    assert routed(router.route_message(make_command("/new_jd"))) == "new_jd"
+
+
+def test_command_in_state_wins_over_stateless_command(router, states):
+    assert routed(router.route_message(make_command("/cancel"))) == "cancel"
+    states[USER_ID] = STATE
+    assert routed(router.route_message(make_command("/cancel"))) == "cancel_in_state"
+
+
+def test_unknown_command_falls_through_to_message_routes(router, states):
+    assert routed(router.route_message(make_command("/unknown"))) == "text"
+    states[USER_ID] = STATE
+    assert routed(router.route_message(make_command("/unknown"))) == "jd_text"
+
+
+def test_stateful_routes_win_over_stateless(router, states):
+    states[USER_ID] = STATE
+    assert routed(router.route_message(make_message(text="jd"))) == "jd_text"
+    assert routed(router.route_message(make_message(**PHOTO))) == "any_in_state"
+    # the state has no forwarded routes, so the stateless ones apply
+    assert routed(router.route_message(make_message(text="jd", **FORWARDED_FROM))) == (
+        "forwarded_text"
+    )
+
+
+def test_content_type_wins_over_any(router):
+    assert routed(router.route_message(make_message(text="post", **FORWARDED_FROM))) == (
+        "forwarded_text"
+    )
+    assert routed(router.route_message(make_message(**PHOTO, **FORWARDED_FROM))) == (
+        "forwarded_any"
+    )
+
+
+def test_forwarded_and_plain_messages_are_routed_apart(router):
+    assert routed(router.route_message(make_message(text="hi"))) == "text"
+    assert routed(router.route_message(make_message(**PHOTO))) is None
+
+
+def test_callback_matches_prefix_in_state_then_any_state(router, states):
+    assert routed(router.route_callback(make_callback("job_type:it"))) is None
+    assert routed(router.route_callback(make_callback("parse_job"))) == "parse_job"
+    states[USER_ID] = STATE
+    assert routed(router.route_callback(make_callback("job_type:it"))) == "job_type"
+    assert routed(router.route_callback(make_callback("parse_job"))) == "parse_job"
+
+
+def test_duplicate_route_is_rejected(router):
+    with pytest.raises(ValueError):
+        router.message(handler("text_again"), types.ContentType.TEXT)
+    router.message(handler("any"), ANY)
+
+
+def test_unmatched_callback_is_answered(router, monkeypatch):
+    answered = []
+
+    async def answer(self, *args, **kwargs):
+        answered.append(self.data)
+
+    monkeypatch.setattr(types.CallbackQuery, "answer", answer)
+    asyncio.run(router.dispatch_callback(make_callback("stale_button")))
+    asyncio.run(router.dispatch_callback(make_callback("parse_job")))
+    assert answered == ["stale_button"]
@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+
+from dsmlkz_admin_bot.utils.single_flight import SingleFlight
+
+
+class Action:
+    def __init__(self, result="saved", fail=False):
+        self.calls = 0
+        self.result = result
+        self.fail = fail
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        if self.fail:
+            raise RuntimeError("failed")
+        return self.result
+
+
+def test_concurrent_calls_share_one_run_and_later_calls_are_memoized():
+    async def scenario():
+        flight, action = SingleFlight("test"), Action()
+        calls = [asyncio.create_task(flight.do("key", action)) for _ in range(3)]
+        await asyncio.sleep(0)
+        action.release.set()
+        results = await asyncio.gather(*calls)
+        return results, await flight.do("key", action), action.calls
+
+    results, memoized, calls = asyncio.run(scenario())
+    assert results == ["saved"] * 3
+    assert memoized == "saved"
+    assert calls == 1
+
+
+def test_failed_action_is_raised_to_all_callers_and_forgotten():
+    async def scenario():
+        flight, action = SingleFlight("test"), Action(fail=True)
+        calls = [asyncio.create_task(flight.do("key", action)) for _ in range(2)]
+        await asyncio.sleep(0)
+        action.release.set()
+        results = await asyncio.gather(*calls, return_exceptions=True)
+        action.fail = False
+        return results, await flight.do("key", action), action.calls
+
+    results, retried, calls = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert retried == "saved"
+    assert calls == 2
+
+
+def test_cancelled_first_caller_is_taken_over_by_a_waiting_one():
+    async def scenario():
+        flight, action = SingleFlight("test"), Action()
+        leader = asyncio.create_task(flight.do("key", action))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("key", action))
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        action.release.set()
+        return leader, await follower, action.calls
+
+    leader, result, calls = asyncio.run(scenario())
+    assert leader.cancelled()
+    assert result == "saved"
+    assert calls == 2
+
+
+def test_cancelled_waiting_caller_does_not_cancel_the_action():
+    async def scenario():
+        flight, action = SingleFlight("test"), Action()
+        leader = asyncio.create_task(flight.do("key", action))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("key", action))
+        await asyncio.sleep(0)
+        follower.cancel()
+        await asyncio.sleep(0)
+        action.release.set()
+        return follower, await leader, action.calls
+
+    follower, result, calls = asyncio.run(scenario())
+    assert follower.cancelled()
+    assert result == "saved"
+    assert calls == 1
+
+
+def test_forget_lets_the_action_run_again():
+    async def scenario():
+        flight, action = SingleFlight("test"), Action()
+        action.release.set()
+        await flight.do("key", action)
+        flight.forget("key")
+        await flight.do("key", action)
+        return action.calls
+
+    assert asyncio.run(scenario()) == 2
+
+
+@pytest.mark.parametrize("key", ["parse_job", ("user", 1)])
+def test_keys_run_independently(key):
+    async def scenario():
+        flight, action = SingleFlight("test"), Action()
+        action.release.set()
+        await flight.do(key, action)
+        await flight.do("other", action)
+        return action.calls
+
+    assert asyncio.run(scenario()) == 2
@@ -0,0 +1,40 @@
+import pytest
+
+from dsmlkz_admin_bot.utils.text_compaction import compact_jd, estimate_tokens
+
+
+@pytest.mark.parametrize(
+    "line, expected",
+    [
+        ("• Python", "- Python"),
+        ("* SQL", "- SQL"),
+        ("— Airflow", "- Airflow"),
+        ("> Docker", "- Docker"),
+        ("**Requirements**", "**Requirements**"),
+        ("-5% bonus", "-5% bonus"),
+        (">=3 years of experience", ">=3 years of experience"),
+        ("-- not a bullet", "-- not a bullet"),
+    ],
+)
+def test_only_single_markers_followed_by_space_become_bullets(line, expected):
+    assert compact_jd(line) == expected
+
+
+def test_emojis_repeated_hashtags_and_duplicate_lines_are_removed():
+    text = "🚀 Data Engineer #job #python\n\nStack: Python\nStack: python\n#job #remote"
+    assert compact_jd(text) == "Data Engineer #job #python\n\nStack: Python\n#remote"
+
+
+def test_decoration_and_boilerplate_lines_are_dropped():
+    text = "Senior ML Engineer\n-----\nGood salary\nSubscribe to our channel\nBest regards,"
+    assert compact_jd(text) == "Senior ML Engineer\n\nGood salary"
+
+
+def test_result_is_capped_on_a_line_boundary():
+    text = "first line\nsecond line\nthird line"
+    assert compact_jd(text, max_chars=25) == "first line\nsecond line"
+
+
+def test_compaction_saves_tokens():
+    text = "🔥🔥🔥 Python Developer 🔥🔥🔥\n•••••\n#python #python #python\nRemote"
+    assert estimate_tokens(compact_jd(text)) < estimate_tokens(text)